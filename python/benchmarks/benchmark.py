@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Benchmarks for loading, data access and geometry hot paths of the devkit.
+
+A synthetic sequence with the PandaSet folder structure is written to disk and every benchmark reports its best wall time over
+`--repeat` runs, the throughput in frames (or cuboids) per second and the peak memory allocated during a separate run.
+
+Run from the `python/` directory:
+    python -m benchmarks.benchmark --frames 10 --output baseline.json
+    python -m benchmarks.benchmark --frames 10 --baseline baseline.json
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from pandaset import geometry
+from pandaset.aggregation import aggregate_points
+from pandaset.colorization import colorize_points
+from pandaset.decoding import CameraBatchDecoder
+from pandaset.sequence import Sequence
+from pandaset.voxelization import Voxelizer
+from .synthetic import make_sequence
+
+
+def _measure(function: Callable[[], None], repeat: int) -> Tuple[float, int]:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    # memory is measured in a separate run, tracing slows down execution
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def _benchmarks(directory: str) -> List[Tuple[str, Callable[[], None], int]]:
+    s = Sequence(directory).load()
+    frames = len(s.lidar.data)
+    camera = s.camera['front_camera']
+    points = [pc[['x', 'y', 'z']].to_numpy() for pc in s.lidar.data]
+    boxes = [cub[geometry._BOX_COLUMNS].to_numpy() for cub in s.cuboids.data]
+    box_count = sum(len(b) for b in boxes)
+    cameras = list(s.camera.values())
+    camera_poses = np.stack([cam.pose_matrices for cam in cameras], axis=1)
+    image_sizes = [cam[0].size for cam in cameras]
+    # projection benchmarks are only meaningful if cameras see a fair share of the points
+    projected = sum(len(points2d) for points2d, _, _ in
+                    geometry.projection_batch(points[0], camera_poses[0], [cam.intrinsics for cam in cameras], image_sizes))
+    assert projected > 0.1 * len(points[0]), f'Only {projected} of {len(points[0])} points project into cameras.'
+    voxelizer = Voxelizer.pillars((0.16, 0.16), (-50, -50, -3, 50, 50, 1), reuse_buffers=True)
+    half_camera = Sequence(directory).camera['front_camera']
+    half_camera.set_decoding(scale=0.5, output='array')
+    decoder = CameraBatchDecoder()
+    # decode from files, loaded frames would only be copied
+    lazy_sequence = Sequence(directory)
+    lazy_sequence.load_camera(lazy=True)
+    lazy_cameras = list(lazy_sequence.camera.values())
+
+    def lidar_data_set_sensor():
+        s.lidar.set_sensor(0)
+        s.lidar.data
+        s.lidar.set_sensor(-1)
+
+    def lidar_getitem_set_sensor():
+        s.lidar.set_sensor(0)
+        for i in range(frames):
+            s.lidar[i]
+        s.lidar.set_sensor(-1)
+
+    return [
+        ('Sequence.load', lambda: Sequence(directory).load(), frames),
+        ('Sequence.load(lazy=True)', lambda: Sequence(directory).load(lazy=True), frames),
+        ('Lidar._load_data_file', lambda: [s.lidar._load_data_file(fp) for fp in s.lidar._data_structure], frames),
+        ('Camera._load_data_file', lambda: [camera._load_data_file(fp) for fp in camera._data_structure], frames),
+        ('Camera._load_data_file(scale=0.5)',
+         lambda: [half_camera._load_data_file(fp) for fp in half_camera._data_structure], frames),
+        ('stacked camera arrays (all cameras)',
+         lambda: [np.stack([np.asarray(cam._load_data_file(cam._data_structure[i])) for cam in cameras])
+                  for i in range(frames)], frames * len(cameras)),
+        ('CameraBatchDecoder.decode (all cameras)',
+         lambda: [decoder.decode([(cam, i) for cam in lazy_cameras]) for i in range(frames)], frames * len(cameras)),
+        ('Cuboids._load_data_file', lambda: [s.cuboids._load_data_file(fp) for fp in s.cuboids._data_structure], frames),
+        ('SemanticSegmentation._load_data_file',
+         lambda: [s.semseg._load_data_file(fp) for fp in s.semseg._data_structure] if s.semseg else None, frames),
+        ('Lidar.data with set_sensor', lidar_data_set_sensor, frames),
+        ('Lidar[i] with set_sensor', lidar_getitem_set_sensor, frames),
+        ('Lidar.points', lambda: [s.lidar.points(i, sensor_id=0) for i in range(frames)], frames),
+        ('projection', lambda: [geometry.projection(points[i], camera[i], camera.poses[i], camera.intrinsics)
+                                for i in range(frames)], frames),
+        ('projection_batch (all cameras)',
+         lambda: geometry.projection_batch(points, camera_poses, [cam.intrinsics for cam in cameras], image_sizes),
+         frames),
+        ('depth_maps (all cameras)',
+         lambda: geometry.depth_maps(points, camera_poses, [cam.intrinsics for cam in cameras], image_sizes), frames),
+        ('colorize_points (all cameras)', lambda: [colorize_points(lazy_sequence, i, sensor_id=-1) for i in range(frames)], frames),
+        ('lidar_points_to_ego', lambda: [geometry.lidar_points_to_ego(points[i], s.lidar.poses[i])
+                                         for i in range(frames)], frames),
+        ('EgoFrames.points (cached)', lambda: [s.ego.points(i, sensor_id=-1) for i in range(frames)], frames),
+        ('EgoFrames.corners (cached)', lambda: [s.ego.corners(i) for i in range(frames)], box_count),
+        ('pd.concat of frames', lambda: pd.concat(s.lidar.data), frames),
+        ('aggregate_points', lambda: aggregate_points(s), frames),
+        ('aggregate_points(voxel_size=0.2)', lambda: aggregate_points(s, voxel_size=0.2), frames),
+        ('Voxelizer.voxelize', lambda: [voxelizer.voxelize(s.lidar[i], s.lidar.poses[i]) for i in range(frames)], frames),
+        ('center_box_to_corners', lambda: [geometry.center_box_to_corners(box) for b in boxes for box in b], box_count),
+        ('center_boxes_to_corners', lambda: [geometry.center_boxes_to_corners(b) for b in boxes], box_count),
+    ]
+
+
+def run(directory: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Runs all benchmarks on a sequence directory.
+
+    Args:
+        directory: Path of a sequence directory.
+        repeat: Number of timed runs per benchmark.
+
+    Returns:
+        Dictionary with benchmark name as key and `seconds`, `items_per_second` and `peak_bytes` as values.
+    """
+    results = {}
+    for name, function, items in _benchmarks(directory):
+        seconds, peak = _measure(function, repeat)
+        results[name] = {'seconds': seconds, 'items_per_second': items / seconds, 'peak_bytes': peak}
+    return results
+
+
+def report(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]] = None) -> str:
+    """Formats benchmark results as a table, optionally with the speedup over a recorded baseline."""
+    lines = [f'{"benchmark":<40}{"seconds":>12}{"items/s":>14}{"peak MiB":>12}' + (f'{"speedup":>10}' if baseline else '')]
+    for name, r in results.items():
+        line = f'{name:<40}{r["seconds"]:>12.4f}{r["items_per_second"]:>14.1f}{r["peak_bytes"] / 2 ** 20:>12.1f}'
+        if baseline:
+            line += f'{baseline[name]["seconds"] / r["seconds"]:>9.2f}x' if name in baseline else f'{"-":>10}'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the pandaset devkit on a synthetic sequence.')
+    parser.add_argument('--directory', help='Sequence directory to use. A synthetic sequence is created if it does not exist. '
+                                            'Defaults to a temporary directory.')
+    parser.add_argument('--frames', type=int, default=10, help='Number of synthetic frames.')
+    parser.add_argument('--points', type=int, default=170000, help='Number of LiDAR points per synthetic frame.')
+    parser.add_argument('--cuboids', type=int, default=100, help='Number of cuboids per synthetic frame.')
+    parser.add_argument('--cameras', type=int, default=6, help='Number of synthetic cameras.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per benchmark.')
+    parser.add_argument('--output', help='Write results as JSON to this file, e.g., to record a baseline.')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.directory or f'{tmp}/000'
+        if not os.path.isdir(directory):
+            make_sequence(directory, frames=args.frames, points=args.points, cuboids=args.cuboids, cameras=args.cameras)
+        results = run(directory, args.repeat)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    print(report(results, baseline))
+    # ru_maxrss is in KiB on Linux
+    print(f'max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+CAMERAS = ['front_camera', 'front_left_camera', 'front_right_camera', 'left_camera', 'right_camera', 'back_camera']
+LABELS = ['Car', 'Pedestrian', 'Bus', 'Bicycle', 'Pickup Truck', 'Signs', 'Cones']
+
+
+def _pose(rng: np.random.Generator, frame: int, yaw_offset: float = 0.0) -> dict:
+    yaw = yaw_offset + 0.01 * frame
+    return {'position': {'x': 1.5 * frame, 'y': 0.1 * frame, 'z': 1.8 + rng.normal(0, 0.01)},
+            'heading': {'w': float(np.cos(yaw / 2)), 'x': 0.0, 'y': 0.0, 'z': float(np.sin(yaw / 2))}}
+
+
+def _quaternion(rotation: np.ndarray) -> dict:
+    # rotation matrix to unit quaternion, valid for rotations with positive trace or angles well below 180°
+    w = np.sqrt(max(0.0, 1.0 + np.trace(rotation))) / 2
+    x = np.copysign(np.sqrt(max(0.0, 1.0 + rotation[0, 0] - rotation[1, 1] - rotation[2, 2])) / 2, rotation[2, 1] - rotation[1, 2])
+    y = np.copysign(np.sqrt(max(0.0, 1.0 - rotation[0, 0] + rotation[1, 1] - rotation[2, 2])) / 2, rotation[0, 2] - rotation[2, 0])
+    z = np.copysign(np.sqrt(max(0.0, 1.0 - rotation[0, 0] - rotation[1, 1] + rotation[2, 2])) / 2, rotation[1, 0] - rotation[0, 1])
+    return {'w': float(w), 'x': float(x), 'y': float(y), 'z': float(z)}
+
+
+def _camera_pose(rng: np.random.Generator, frame: int, yaw_offset: float = 0.0) -> dict:
+    # cameras look horizontally along the vehicle yaw: camera x to the right, y down and z forward
+    pose = _pose(rng, frame, yaw_offset)
+    yaw = yaw_offset + 0.01 * frame
+    rotation_z = np.array([[np.cos(yaw), -np.sin(yaw), 0.0], [np.sin(yaw), np.cos(yaw), 0.0], [0.0, 0.0, 1.0]])
+    pose['heading'] = _quaternion(rotation_z @ np.array([[0.0, 0.0, 1.0], [-1.0, 0.0, 0.0], [0.0, -1.0, 0.0]]))
+    return pose
+
+
+def _point_cloud(rng: np.random.Generator, frame: int, points: int) -> pd.DataFrame:
+    # roughly 64% of points from the mechanical LiDAR, ordered by sensor like PandaSet
+    n0 = int(points * 0.64)
+    n1 = points - n0
+    azimuth = rng.uniform(-np.pi, np.pi, n0)
+    distance = rng.gamma(2.0, 10.0, n0)
+    xyz0 = np.c_[distance * np.cos(azimuth), distance * np.sin(azimuth), rng.normal(-1.0, 1.5, n0)]
+    xyz1 = np.c_[rng.uniform(-20, 20, n1), rng.uniform(2, 150, n1), rng.normal(-1.0, 1.5, n1)]
+    xyz = np.r_[xyz0, xyz1] + [1.5 * frame, 0.1 * frame, 1.8]
+    df = pd.DataFrame({'x': xyz[:, 0],
+                       'y': xyz[:, 1],
+                       'z': xyz[:, 2],
+                       'i': rng.integers(0, 256, points).astype(np.float64),
+                       't': 1557540000.0 + 0.1 * frame + rng.uniform(0, 0.1, points),
+                       'd': np.r_[np.zeros(n0, dtype=np.int64), np.ones(n1, dtype=np.int64)]})
+    df.index.name = 'index'
+    return df
+
+
+def _cuboids(rng: np.random.Generator, frame: int, cuboids: int) -> pd.DataFrame:
+    labels = rng.choice(LABELS, cuboids)
+    return pd.DataFrame({'uuid': [f'{j:08x}-0000-0000-0000-000000000000' for j in range(cuboids)],
+                         'label': labels,
+                         'yaw': rng.uniform(-np.pi, np.pi, cuboids),
+                         'stationary': rng.random(cuboids) > 0.5,
+                         'camera_used': rng.integers(-1, 6, cuboids),
+                         'position.x': rng.uniform(-60, 60, cuboids) + 1.5 * frame,
+                         'position.y': rng.uniform(-60, 60, cuboids),
+                         'position.z': rng.uniform(-1, 1, cuboids),
+                         'dimensions.x': rng.uniform(0.5, 3.0, cuboids),
+                         'dimensions.y': rng.uniform(0.5, 10.0, cuboids),
+                         'dimensions.z': rng.uniform(0.5, 4.0, cuboids),
+                         'attributes.object_motion': rng.choice(['Moving', 'Parked', 'Stopped'], cuboids),
+                         'cuboids.sibling_id': '-',
+                         'cuboids.sensor_id': -1,
+                         'attributes.rider_status': None,
+                         'attributes.pedestrian_behavior': None,
+                         'attributes.pedestrian_age': None})
+
+
+def _image(rng: np.random.Generator, width: int, height: int) -> Image.Image:
+    # smooth gradients with noise compress to a JPEG size close to real camera images
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[np.newaxis, :, np.newaxis]
+    noise = rng.normal(0, 20, (height, width, 3)).astype(np.float32)
+    return Image.fromarray(np.clip(gradient + noise, 0, 255).astype(np.uint8))
+
+
+def make_sequence(directory: str, frames: int = 80, points: int = 170000, cuboids: int = 100,
+                  cameras: int = 6, image_size: tuple = (1920, 1080), semseg: bool = True, seed: int = 0) -> str:
+    """Writes a synthetic sequence with the PandaSet folder structure and file formats.
+
+    Args:
+        directory: Path of the sequence directory to create.
+        frames: Number of frames.
+        points: Number of LiDAR points per frame.
+        cuboids: Number of cuboids per frame.
+        cameras: Number of cameras, at most 6.
+        image_size: Camera image size as `(width, height)`.
+        semseg: If `True`, semantic segmentation annotations are written.
+        seed: Random seed.
+
+    Returns:
+        Path of the sequence directory.
+    """
+    rng = np.random.default_rng(seed)
+    camera_names = CAMERAS[:cameras]
+    for d in ['lidar', 'meta', 'annotations/cuboids'] + [f'camera/{c}' for c in camera_names] + \
+            (['annotations/semseg'] if semseg else []):
+        os.makedirs(f'{directory}/{d}', exist_ok=True)
+
+    timestamps = [1557540000.0 + 0.1 * f for f in range(frames)]
+    for f in range(frames):
+        _point_cloud(rng, f, points).to_pickle(f'{directory}/lidar/{f:02d}.pkl.gz')
+        _cuboids(rng, f, cuboids).to_pickle(f'{directory}/annotations/cuboids/{f:02d}.pkl.gz')
+        if semseg:
+            pd.DataFrame({'class': rng.integers(1, 43, points).astype(str)}) \
+                .to_pickle(f'{directory}/annotations/semseg/{f:02d}.pkl.gz')
+        for c in camera_names:
+            _image(rng, *image_size).save(f'{directory}/camera/{c}/{f:02d}.jpg', quality=90)
+
+    sensor_directories = {'lidar': (_pose, 0.0)}
+    sensor_directories.update({f'camera/{c}': (_camera_pose, i * np.pi / 3) for i, c in enumerate(camera_names)})
+    for d, (pose, yaw_offset) in sensor_directories.items():
+        with open(f'{directory}/{d}/poses.json', 'w') as fp:
+            json.dump([pose(rng, f, yaw_offset) for f in range(frames)], fp)
+        with open(f'{directory}/{d}/timestamps.json', 'w') as fp:
+            json.dump(timestamps, fp)
+    for c in camera_names:
+        with open(f'{directory}/camera/{c}/intrinsics.json', 'w') as fp:
+            json.dump({'fx': 1970.0, 'fy': 1970.0, 'cx': image_size[0] / 2, 'cy': image_size[1] / 2}, fp)
+    with open(f'{directory}/meta/timestamps.json', 'w') as fp:
+        json.dump(timestamps, fp)
+    with open(f'{directory}/meta/gps.json', 'w') as fp:
+        json.dump([{'lat': 37.776 + 1e-5 * f, 'long': -122.399, 'height': 2.95, 'xvel': 15.0, 'yvel': 0.0}
+                   for f in range(frames)], fp)
+    if semseg:
+        with open(f'{directory}/annotations/semseg/classes.json', 'w') as fp:
+            json.dump({str(k): f'Class {k}' for k in range(1, 43)}, fp)
+    return directory
+
+
+if __name__ == '__main__':
+    pass
@@ -1,3 +1,4 @@
 #!/usr/bin/env python3
 from .dataset import DataSet
 from .geometry import projection
+from .geometry import projection_batch
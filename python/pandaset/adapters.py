@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import random
+import sys
+from typing import Callable, Dict, Iterator, List, Tuple, TypeVar
+
+from .dataset import DataSet
+
+T = TypeVar('T')
+
+
+def _torch_worker_info() -> Tuple[int, int]:
+    # only consult torch if the application already imported it, this module never imports torch itself
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        info = torch.utils.data.get_worker_info()
+        if info is not None:
+            return info.id, info.num_workers
+    return 0, 1
+
+
+class FrameDataset:
+    """Map-style adapter over all frames of a ``DataSet``.
+
+    ``FrameDataset`` implements `__len__` and `__getitem__` over the global frame index of ``DataSet.frame_index``, so it can be used directly with
+    data loaders which expect map-style datasets, e.g., `torch.utils.data.DataLoader`. Each item is read from disk on access and not kept in memory,
+    unless the ``DataSet`` has a ``FrameCache``. No sequence is loaded completely, so memory is not duplicated across loader worker processes.
+
+    Args:
+        dataset: ``DataSet`` to read frames from.
+        sensors: Names of data to read for each frame, see ``Sequence.frame``. Defaults to all available data.
+        with_semseg: Set `True` to only include frames of sequences with semantic segmentation annotations.
+        transform: Optional callable applied to every frame dictionary before it is returned.
+
+    Examples:
+        >>> frames = FrameDataset(DataSet('/data/pandaset', manifest=True), sensors=['lidar', 'cuboids'])
+        >>> print(len(frames))
+        8240
+        >>> frame = frames[1234]
+    """
+
+    def __init__(self, dataset: DataSet, sensors: List[str] = None, with_semseg: bool = False,
+                 transform: Callable[[Dict], T] = None) -> None:
+        self._dataset: DataSet = dataset
+        self._sensors: List[str] = sensors
+        self._transform: Callable[[Dict], T] = transform
+        self._index: List[Tuple[str, int]] = dataset.frame_index(with_semseg)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, item: int) -> T:
+        sequence, index = self._index[item]
+        frame = self._dataset[sequence].frame(index, self._sensors)
+        frame['sequence'] = sequence
+        return self._transform(frame) if self._transform is not None else frame
+
+
+class IterableFrameDataset:
+    """Iterable adapter over all frames of a ``DataSet``, sharded by sequence across workers and ranks.
+
+    Sequences are split across `world_size` ranks and `num_workers` loader workers per rank without overlap, so every worker streams complete
+    sequences with ``Sequence.iter_frames`` and only holds the frames it currently reads ahead in memory. If `worker_id` and `num_workers` are not given,
+    they are taken from `torch.utils.data.get_worker_info()` when the application has imported torch, otherwise a single worker is assumed.
+
+    Args:
+        dataset: ``DataSet`` to read frames from.
+        sensors: Names of data to read for each frame, see ``Sequence.frame``. Defaults to all available data.
+        with_semseg: Set `True` to only include sequences with semantic segmentation annotations.
+        transform: Optional callable applied to every frame dictionary before it is yielded.
+        shuffle: Set `True` to shuffle the sequence order before sharding. Use ``set_epoch`` to change the order between epochs.
+        seed: Random seed for shuffling. Must be the same on all ranks.
+        rank: Rank of the current process in distributed training.
+        world_size: Number of processes in distributed training.
+        worker_id: Id of the current loader worker within its rank.
+        num_workers: Number of loader workers per rank.
+        prefetch: Number of frames to read ahead, see ``Sequence.iter_frames``.
+
+    Examples:
+        >>> frames = IterableFrameDataset(DataSet('/data/pandaset'), sensors=['lidar'], shuffle=True, rank=rank, world_size=world_size)
+        >>> for epoch in range(10):
+        >>>     frames.set_epoch(epoch)
+        >>>     for frame in frames:
+        >>>         ...
+    """
+
+    def __init__(self, dataset: DataSet, sensors: List[str] = None, with_semseg: bool = False,
+                 transform: Callable[[Dict], T] = None, shuffle: bool = False, seed: int = 0,
+                 rank: int = 0, world_size: int = 1, worker_id: int = None, num_workers: int = None,
+                 prefetch: int = 2) -> None:
+        self._dataset: DataSet = dataset
+        self._sensors: List[str] = sensors
+        self._sequences: List[str] = sorted(dataset.sequences(with_semseg))
+        self._transform: Callable[[Dict], T] = transform
+        self._shuffle: bool = shuffle
+        self._seed: int = seed
+        self._epoch: int = 0
+        self._rank: int = rank
+        self._world_size: int = world_size
+        self._worker_id: int = worker_id
+        self._num_workers: int = num_workers
+        self._prefetch: int = prefetch
+
+    def set_epoch(self, epoch: int) -> None:
+        """Sets the epoch used to shuffle the sequence order.
+
+        Args:
+            epoch: Epoch number. Must be the same on all ranks.
+        """
+        self._epoch = epoch
+
+    def shard(self) -> List[str]:
+        """Lists the sequences assigned to the current rank and worker.
+
+        Returns:
+            List of sequence names in iteration order.
+        """
+        worker_id, num_workers = self._worker_id, self._num_workers
+        if worker_id is None or num_workers is None:
+            worker_id, num_workers = _torch_worker_info()
+        sequences = list(self._sequences)
+        if self._shuffle:
+            random.Random(self._seed + self._epoch).shuffle(sequences)
+        shard_id = self._rank * num_workers + worker_id
+        return sequences[shard_id::self._world_size * num_workers]
+
+    def __iter__(self) -> Iterator[T]:
+        for sequence in self.shard():
+            for frame in self._dataset[sequence].iter_frames(self._sensors, self._prefetch):
+                frame['sequence'] = sequence
+                yield self._transform(frame) if self._transform is not None else frame
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+from typing import Iterable, Union
+
+import numpy as np
+
+from .geometry import _BOX_COLUMNS, points_in_cuboids
+from .sensors import _points_dtype
+from .sequence import Sequence
+
+# voxel indices are packed into one int64 key with 21 bits per axis
+_VOXEL_BITS = 21
+_VOXEL_OFFSET = 1 << (_VOXEL_BITS - 1)
+
+
+def _voxel_keys(xyz: np.ndarray, voxel_size: float) -> np.ndarray:
+    indices = np.floor(xyz / voxel_size).astype(np.int64) + _VOXEL_OFFSET
+    if len(indices) and (indices.min() < 0 or indices.max() >= 1 << _VOXEL_BITS):
+        raise ValueError(f'Points exceed the voxel grid range of {_VOXEL_OFFSET * voxel_size} m. Use a larger `voxel_size`.')
+    return (indices[:, 0] << (2 * _VOXEL_BITS)) | (indices[:, 1] << _VOXEL_BITS) | indices[:, 2]
+
+
+def aggregate_points(sequence: Sequence, frames: Iterable[int] = None, target: Union[str, int] = 'world',
+                     sensor_id: int = -1, columns: str = 'xyzi', remove_moving: bool = False,
+                     voxel_size: float = None) -> np.ndarray:
+    """Aggregates LiDAR points of multiple frames of a sequence into a single point cloud.
+
+    Frames are read one at a time and written into one preallocated array, which grows geometrically only if needed. No per-frame data frames are kept
+    and nothing is concatenated at the end, so memory is bounded by the size of the result. With `voxel_size`, points are downsampled while streaming:
+    a point is only added if its voxel is not occupied yet, so each voxel keeps the first point in frame order and the result is bounded by the number of occupied voxels,
+    which allows aggregating complete sequences into a map.
+
+    Args:
+        sequence: Sequence to aggregate points of. LiDAR and, with `remove_moving`, cuboids are loaded lazily if they have not been loaded before.
+        frames: Frame indices to aggregate, in order. Defaults to all frames.
+        target: `'world'` to return points in world-coordinates, or a frame index `k` to return points in the ego-coordinates of the LiDAR at frame `k`, see ``geometry.lidar_points_to_ego``.
+        sensor_id: Set `-1` for both LiDAR sensors, set `0` for mechanical 360° LiDAR, set `1` for front-facing LiDAR.
+        columns: Point cloud columns to return, starting with `'xyz'`, see ``Lidar.points``.
+        remove_moving: If `True`, points inside cuboids of non-stationary objects of the same frame are dropped, e.g., to build maps of the static scene.
+        voxel_size: Edge length of voxels in meter for streaming downsampling. Defaults to no downsampling.
+
+    Returns:
+        `float32` array of shape `(M, len(columns))`, or `float64` array if `columns` contains `t`, see ``Lidar.points``.
+
+    Examples:
+        >>> past_sweeps = aggregate_points(s, frames=range(35, 41), target=40, sensor_id=0)
+        >>> static_map = aggregate_points(s, remove_moving=True, voxel_size=0.1)
+    """
+    if not columns.startswith('xyz'):
+        raise ValueError(f'Invalid columns `{columns}`. Columns must start with `xyz`.')
+    if not (target == 'world' or isinstance(target, (int, np.integer))):
+        raise ValueError(f'Invalid target `{target}`. Use `world` or a frame index.')
+    lidar = sequence.lidar
+    if lidar._data is None:
+        lidar.load(lazy=True)
+    frames = range(len(lidar)) if frames is None else frames
+    transform = None if target == 'world' else lidar.inverse_pose_matrices[target]
+
+    moving = None
+    if remove_moving:
+        if sequence.cuboids._data is None:
+            sequence.cuboids.load(lazy=True)
+        table = sequence.cuboids.table
+        moving = table[~table['stationary'].to_numpy(dtype=bool)]
+        moving_frames = moving['frame'].to_numpy()
+        moving = moving[_BOX_COLUMNS].to_numpy(dtype=np.float64)
+
+    dtype = _points_dtype(columns)
+    buffer = None
+    size = 0
+    occupied = np.empty(0, dtype=np.int64)
+    for index in frames:
+        points = lidar._points(index, sensor_id, columns, keep=False)
+        xyz = points[:, :3].astype(np.float64)
+        if moving is not None:
+            start, end = np.searchsorted(moving_frames, [index, index + 1])
+            if end > start:
+                keep = points_in_cuboids(xyz, moving[start:end]) < 0
+                points, xyz = points[keep], xyz[keep]
+        if transform is not None:
+            xyz = xyz @ transform[:3, :3].T + transform[:3, 3]
+        if voxel_size is not None:
+            keys, first = np.unique(_voxel_keys(xyz, voxel_size), return_index=True)
+            positions = np.searchsorted(occupied, keys)
+            new = occupied[np.minimum(positions, len(occupied) - 1)] != keys if len(occupied) else np.ones(len(keys), dtype=bool)
+            occupied = np.insert(occupied, positions[new], keys[new])
+            rows = np.sort(first[new])
+            points, xyz = points[rows], xyz[rows]
+
+        if buffer is None:
+            # without downsampling, all frames are assumed to have about as many points as the first one
+            frame_count = len(frames) if hasattr(frames, '__len__') and voxel_size is None else 2
+            buffer = np.empty((max(len(points), 1) * frame_count, len(columns)), dtype=dtype)
+        elif size + len(points) > len(buffer):
+            grown = np.empty((max(2 * len(buffer), size + len(points)), len(columns)), dtype=dtype)
+            grown[:size] = buffer[:size]
+            buffer = grown
+        buffer[size:size + len(points), :3] = xyz
+        buffer[size:size + len(points), 3:] = points[:, 3:]
+        size += len(points)
+
+    if buffer is None:
+        return np.empty((0, len(columns)), dtype=dtype)
+    # copy to release the unused capacity
+    return buffer[:size].copy() if size < len(buffer) else buffer
+
+
+if __name__ == '__main__':
+    pass
@@ -3,14 +3,20 @@ import glob
 import json
 import os
 from abc import ABCMeta, abstractmethod
-from typing import overload, List, TypeVar, Dict
+from typing import overload, List, TypeVar, Dict, Type
 
+import numpy as np
 import pandas as pd
 
+from .cache import FrameCache
+from .columnar import COLUMNAR_DIRECTORY, TableColumns, _ColumnarSource, class_labels
+from .tracks import Tracks
+from .utils import map_ordered
+
 T = TypeVar('T')
 
 
-class Annotation:
+class Annotation(_ColumnarSource):
     """Meta class inherited by subclasses for more specific annotation types.
 
     ``Annotation`` provides generic preparation and loading methods for PandaSet folder structures. Subclasses
@@ -18,6 +24,8 @@ class Annotation:
 
     Args:
          directory: Absolute or relative path where annotation files are stored
+         cache: Optional ``FrameCache`` which holds lazily loaded frames instead of the annotation object itself
+         structure: Optional file structure as returned by ``_dump_structure``, e.g., from a ``DataSet`` manifest. If given, the directory is not searched for files.
 
     Attributes:
         data: List of annotation data objects. The type of list elements depends on the subclass implementation of protected method ``_load_data_file``
@@ -29,19 +37,35 @@ class Annotation:
     def _data_file_extension(self) -> str:
         ...
 
+    @property
+    def _columns_reader(self) -> Type[TableColumns]:
+        return TableColumns
+
     @property
     def data(self) -> List[T]:
         """Returns annotation data array.
 
         Subclasses can use any type inside array.
         """
+        if self._lazy:
+            return self[:]
         return self._data
 
-    def __init__(self, directory: str) -> None:
+    def __init__(self, directory: str, cache: FrameCache = None, structure: Dict = None) -> None:
         self._directory: str = directory
         self._data_structure: List[str] = None
         self._data: List[T] = None
-        self._load_structure()
+        self._lazy: bool = False
+        self._cache: FrameCache = cache
+        self._columns_structure: str = None
+        self._columns: TableColumns = None
+        if structure is None:
+            self._load_structure()
+        else:
+            self._restore_structure(structure)
+
+    def __len__(self) -> int:
+        return len(self._data_structure)
 
     @overload
     def __getitem__(self, item: int) -> T:
@@ -52,26 +76,64 @@ class Annotation:
         ...
 
     def __getitem__(self, item):
-        return self.data[item]
+        if isinstance(item, slice):
+            return [self._frame(i) for i in range(len(self._data))[item]]
+        return self._frame(item)
+
+    def _frame(self, index: int, keep: bool = True) -> T:
+        data = self._data[index]
+        if data is None:
+            fp = self._data_structure[index]
+            if self._cache is None:
+                data = self._load_data_file(fp)
+                if keep:
+                    self._data[index] = data
+            else:
+                data = self._cache.get(fp)
+                if data is None:
+                    data = self._load_data_file(fp)
+                    self._cache.put(fp, data)
+        return data
 
     def _load_structure(self) -> None:
         self._load_data_structure()
+        self._load_columns_structure()
 
     def _load_data_structure(self) -> None:
         self._data_structure = sorted(
             glob.glob(f'{self._directory}/*.{self._data_file_extension}'))
 
-    def load(self) -> None:
+    def _dump_structure(self) -> Dict:
+        return {'files': [os.path.basename(fp) for fp in self._data_structure],
+                'sizes': [os.path.getsize(fp) if os.path.isfile(fp) else None for fp in self._data_structure],
+                'columnar': self._columns_structure is not None}
+
+    def _restore_structure(self, structure: Dict) -> None:
+        self._data_structure = [f'{self._directory}/{f}' for f in structure['files']]
+        if structure['columnar']:
+            self._columns_structure = f'{self._directory}/{COLUMNAR_DIRECTORY}'
+
+    def load(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> None:
         """Loads all annotation files from disk into memory.
 
         All annotation files are loaded into memory in filename order.
-        """
-        self._load_data()
 
-    def _load_data(self) -> None:
-        self._data = []
-        for fp in self._data_structure:
-            self._data.append(self._load_data_file(fp))
+        Args:
+            lazy: If `True`, annotation files are read from disk on first access of their frame index instead.
+            workers: Number of parallel workers to read annotation files with. Default reads files sequentially.
+            executor: `'thread'` or `'process'` pool for `workers`.
+        """
+        self._load_columns()
+        self._lazy = lazy
+        if lazy:
+            self._data = [None] * len(self._data_structure)
+        else:
+            self._load_data(workers, executor)
+
+    def _load_data(self, workers: int = None, executor: str = 'thread') -> None:
+        # previously loaded frames must not be pickled to process workers
+        self._data = None
+        self._data = map_ordered(self._load_data_file, self._data_structure, workers, executor)
 
     @abstractmethod
     def _load_data_file(self, fp: str) -> None:
@@ -168,10 +230,55 @@ class Cuboids(Annotation):
                     - For cuboids which have `cuboids.sensor_id` set to `0` or `1`: this field stores the `uuid` of the sibling cuboid, i.e., measuring the same object in the overlap region, but with the other respective sensor.
 
         """
-        return self._data
+        return super().data
+
+    @property
+    def table(self) -> pd.DataFrame:
+        """Returns cuboids of all frames as one compact data frame.
+
+        The table is built on first access and kept until the next ``load``. It has the same columns as the frames in ``data``, in a compact representation:
+            - `frame`: `int`
+                - Frame index of the cuboid. Rows are ordered by frame and keep the row order of each frame.
+            - `uuid`, `label`, `attributes.*`, `cuboids.sibling_id`: `category`
+                - Dictionary-encoded once for the whole sequence. Integer codes are available with `.cat.codes`, missing values have code `-1`.
+            - `yaw`, `position.*`, `dimensions.*`: `float32`
+            - `camera_used`, `cuboids.sensor_id`: `int8`
+
+        Compared to the list of frames, the table needs several times less memory and allows sequence-wide filters as a single vectorized mask.
+
+        Returns:
+            Data frame with one row per cuboid of the sequence.
+
+        Examples:
+            >>> cuboids = s.cuboids.table
+            >>> pedestrians = cuboids[cuboids['label'] == 'Pedestrian']
+            >>> print(pedestrians.groupby('frame').size())
+        """
+        if self._table is None:
+            self._table = self._load_table()
+        return self._table
+
+    @property
+    def tracks(self) -> Tracks:
+        """Returns the index of all object tracks of the sequence.
+
+        The index is built from ``table`` on first access and kept until the next ``load``.
+
+        Returns:
+            Instance of class ``Tracks``
+
+        Examples:
+            >>> track = s.cuboids.tracks[uuid]
+            >>> print(track.frames, track.positions)
+        """
+        if self._tracks is None:
+            self._tracks = Tracks(self.table)
+        return self._tracks
 
-    def __init__(self, directory: str) -> None:
-        Annotation.__init__(self, directory)
+    def __init__(self, directory: str, cache: FrameCache = None, structure: Dict = None) -> None:
+        self._table: pd.DataFrame = None
+        self._tracks: Tracks = None
+        Annotation.__init__(self, directory, cache, structure)
 
     @overload
     def __getitem__(self, item: int) -> pd.DataFrame:
@@ -184,9 +291,38 @@ class Cuboids(Annotation):
     def __getitem__(self, item):
         return super().__getitem__(item)
 
+    def load(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> None:
+        self._table = None
+        self._tracks = None
+        super().load(lazy, workers, executor)
+
     def _load_data_file(self, fp: str) -> None:
+        if self._columns is not None:
+            return self._columns.frame(self._data_structure.index(fp))
         return pd.read_pickle(fp)
 
+    def _load_table(self) -> pd.DataFrame:
+        if self._columns is not None:
+            # a repacked sequence already stores all frames concatenated
+            frames = self._columns.table
+            sizes = np.diff(self._columns.offsets)
+        else:
+            frames = [self._frame(i, keep=False) for i in range(len(self._data_structure))]
+            sizes = [len(df) for df in frames]
+            frames = pd.concat(frames) if frames else pd.DataFrame()
+
+        columns = {'frame': np.repeat(np.arange(len(sizes), dtype=np.int16 if len(sizes) < 2 ** 15 else np.int32), sizes)}
+        for name, column in frames.items():
+            if pd.api.types.is_bool_dtype(column):
+                columns[name] = column.to_numpy()
+            elif pd.api.types.is_float_dtype(column):
+                columns[name] = column.to_numpy(dtype=np.float32)
+            elif pd.api.types.is_integer_dtype(column):
+                columns[name] = pd.to_numeric(column, downcast='integer').to_numpy()
+            else:
+                columns[name] = pd.Categorical(column)
+        return pd.DataFrame(columns)
+
 
 class SemanticSegmentation(Annotation):
     """Loads and provides Semantic Segmentation annotations. Subclass of ``Annotation``.
@@ -216,7 +352,7 @@ class SemanticSegmentation(Annotation):
                 - `class`: `str`
                     - Class ID as a number in string format. Can be used to find class name from ``classes`` property.
         """
-        return self._data
+        return super().data
 
     @property
     def classes(self) -> Dict[str, str]:
@@ -227,10 +363,28 @@ class SemanticSegmentation(Annotation):
         """
         return self._classes
 
-    def __init__(self, directory: str) -> None:
+    @property
+    def class_names(self) -> np.ndarray:
+        """Returns class names as a lookup array indexed by class ID.
+
+        Returns:
+            Object array of length `256`, so it can be indexed by the class IDs returned by ``labels``. Unused class IDs are `None`.
+
+        Examples:
+            >>> names = s.semseg.class_names[s.semseg.labels(0)]
+        """
+        if self._class_names is None:
+            self._class_names = np.full(256, None, dtype=object)
+            for class_id, name in self._classes.items():
+                self._class_names[int(class_id)] = name
+        return self._class_names
+
+    def __init__(self, directory: str, cache: FrameCache = None, structure: Dict = None) -> None:
         self._classes_structure: str = None
         self._classes: Dict[str, str] = None
-        Annotation.__init__(self, directory)
+        self._class_names: np.ndarray = None
+        self._labels: List[np.ndarray] = None
+        Annotation.__init__(self, directory, cache, structure)
 
     @overload
     def __getitem__(self, item: int) -> pd.DataFrame:
@@ -243,8 +397,34 @@ class SemanticSegmentation(Annotation):
     def __getitem__(self, item):
         return super().__getitem__(item)
 
-    def load(self) -> None:
-        super().load()
+    def labels(self, index: int) -> np.ndarray:
+        """Returns the class IDs of a single frame as compact array aligned with the LiDAR points.
+
+        Class IDs are converted once per frame and kept as `uint8` array, which needs a fraction of the memory of the data frame with one `class` value per point.
+        Load with `lazy=True` to only keep these arrays in memory. If the sequence has been repacked, class IDs are read-only views on a memory-mapped array.
+
+        Args:
+            index: Frame index
+
+        Returns:
+            `uint8` array of shape `(N,)` in the order of the points of ``Lidar.data`` (without sensor filter). Use ``class_names`` to look up class names.
+
+        Examples:
+            >>> labels = s.semseg.labels(0)
+            >>> cars = s.lidar[0][labels == 13]
+        """
+        index = range(len(self._data_structure))[index]
+        if self._columns is not None and self._columns.labels is not None:
+            return self._columns.labels[self._columns.offsets[index]:self._columns.offsets[index + 1]]
+        labels = self._labels[index]
+        if labels is None:
+            labels = class_labels(self._frame(index, keep=False)['class'])
+            self._labels[index] = labels
+        return labels
+
+    def load(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> None:
+        super().load(lazy, workers, executor)
+        self._labels = [None] * len(self._data_structure)
         self._load_classes()
 
     def _load_structure(self) -> None:
@@ -256,13 +436,26 @@ class SemanticSegmentation(Annotation):
         if os.path.isfile(classes_file):
             self._classes_structure = classes_file
 
+    def _dump_structure(self) -> Dict:
+        structure = super()._dump_structure()
+        structure['classes'] = self._classes_structure is not None
+        return structure
+
+    def _restore_structure(self, structure: Dict) -> None:
+        super()._restore_structure(structure)
+        if structure['classes']:
+            self._classes_structure = f'{self._directory}/classes.json'
+
     def _load_data_file(self, fp: str) -> None:
+        if self._columns is not None:
+            return self._columns.frame(self._data_structure.index(fp))
         return pd.read_pickle(fp)
 
     def _load_classes(self) -> None:
         with open(self._classes_structure, 'r') as f:
             file_data = json.load(f)
             self._classes = file_data
+        self._class_names = None
 
 
 if __name__ == '__main__':
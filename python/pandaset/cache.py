@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Hashable, TypeVar, Optional, Dict
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+T = TypeVar('T')
+
+
+def sizeof(obj: T) -> int:
+    """Estimates the memory held by a loaded frame object.
+
+    Args:
+        obj: A loaded frame, e.g., a point cloud ``DataFrame``, a camera image or a ``numpy.ndarray``.
+
+    Returns:
+        Size in bytes. Data frames are measured including object column contents, images by their decoded pixel buffer.
+    """
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    elif isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    elif isinstance(obj, Image.Image):
+        return obj.width * obj.height * len(obj.getbands())
+    else:
+        return sys.getsizeof(obj)
+
+
+class FrameCache:
+    """Least-recently-used cache for loaded frames with a memory budget.
+
+    ``FrameCache`` holds loaded sensor and annotation frames up to a total size of `max_bytes`. When a new frame does not fit,
+    least recently accessed frames are evicted until it does. A single cache can be shared by all sequences of a ``DataSet``.
+
+    Args:
+        max_bytes: Memory budget in bytes.
+
+    Examples:
+        >>> pandaset = DataSet('/data/pandaset', cache_size=8 * 1024 ** 3)
+        >>> for sequence in pandaset.sequences():
+        >>>     seq = pandaset[sequence].load(lazy=True)
+        >>>     # frames are read on access and evicted when the 8 GiB budget is exceeded
+        >>> print(pandaset.cache.hits, pandaset.cache.misses, pandaset.cache.evictions)
+    """
+
+    @property
+    def max_bytes(self) -> int:
+        """Memory budget of the cache.
+
+        Returns:
+            Maximum size of all cached frames in bytes.
+        """
+        return self._max_bytes
+
+    @property
+    def current_bytes(self) -> int:
+        """Memory currently held by the cache.
+
+        Returns:
+            Size of all cached frames in bytes.
+        """
+        return self._current_bytes
+
+    @property
+    def hits(self) -> int:
+        """Number of lookups which returned a cached frame."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Number of lookups which did not find a cached frame."""
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        """Number of frames removed to stay within the memory budget."""
+        return self._evictions
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes: int = max_bytes
+        self._current_bytes: int = 0
+        self._hits: int = 0
+        self._misses: int = 0
+        self._evictions: int = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        # cached frames and the lock are not transferred to other processes
+        return {'max_bytes': self._max_bytes}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(state['max_bytes'])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """Returns a cached frame and marks it as most recently used.
+
+        Args:
+            key: Cache key of the frame.
+
+        Returns:
+            The cached frame, or `None` if the key is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: T) -> None:
+        """Adds a frame to the cache and evicts least recently used frames if the memory budget is exceeded.
+
+        Frames larger than the complete budget are not cached.
+
+        Args:
+            key: Cache key of the frame.
+            value: Loaded frame object.
+        """
+        size = sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._entries.pop(key)[1]
+            if size > self._max_bytes:
+                return
+            while self._entries and self._current_bytes + size > self._max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                self._evictions += 1
+            self._entries[key] = (value, size)
+            self._current_bytes += size
+
+    def clear(self) -> None:
+        """Removes all frames from the cache. Counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+from typing import List, Tuple
+
+import numpy as np
+
+from .geometry import projection_batch
+from .sensors import Camera
+from .sequence import Sequence
+from .utils import map_ordered
+
+
+def _image_box(camera: Camera, index: int) -> Tuple[int, int, int, int]:
+    # area of the full resolution image which is covered by decoded images, see ``Camera.set_decoding``
+    _, crop, _ = camera._decoding
+    if crop is not None:
+        return crop
+    with camera._open(camera._data_structure[index]) as img:
+        # only the JPEG header is read
+        return (0, 0) + img.size
+
+
+def colorize_points(sequence: Sequence, index: int, sensor_id: int = None, cameras: List[str] = None,
+                    workers: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Colors the LiDAR points of a single frame with the pixels of all cameras in one pass.
+
+    Points are projected into all cameras at once with ``geometry.projection_batch``. Where fields of view overlap, each point takes its color from the camera in which
+    it is closest to the image center, relative to the image size, where lens distortion and motion blur are lowest. Only cameras which are chosen for at least one point are decoded,
+    and pixels are sampled with one vectorized lookup per camera. Occlusion between the LiDAR and camera viewpoints is not resolved.
+
+    Images are decoded with the ``Camera.set_decoding`` settings of each camera, e.g., `scale=0.5` to decode at reduced resolution, and point positions are mapped into the decoded images.
+
+    Args:
+        sequence: Sequence to colorize. LiDAR and cameras are loaded lazily if they have not been loaded before.
+        index: Frame index
+        sensor_id: Set `-1` for both LiDAR sensors, set `0` for mechanical 360° LiDAR, set `1` for front-facing LiDAR. Defaults to the sensor chosen with ``Lidar.set_sensor``.
+        cameras: Names of cameras to sample from. Defaults to all cameras in ``Sequence.camera``.
+        workers: Number of threads to decode and sample cameras in parallel. If `None` or smaller than `2`, cameras are processed in the calling thread.
+
+    Returns:
+        Tuple of
+            - `colors`: `uint8` array of shape `(N, 3)` with RGB values, aligned with ``Lidar.points``. Points without camera are black.
+            - `camera_ids`: `int8` array of shape `(N,)` with the position of the source camera in `cameras`, `-1` for points outside all cameras.
+
+    Examples:
+        >>> names = list(s.camera.keys())
+        >>> colors, camera_ids = colorize_points(s, 0, sensor_id=0, workers=6)
+        >>> print(names[camera_ids[0]])
+        front_camera
+    """
+    names = list(sequence.camera.keys()) if cameras is None else cameras
+    if not names:
+        raise ValueError('No cameras to colorize points with.')
+    unknown = set(names) - set(sequence.camera.keys())
+    if unknown:
+        raise ValueError(f'Unknown cameras {sorted(unknown)}.')
+    lidar = sequence.lidar
+    objects = [lidar] + [sequence.camera[name] for name in names]
+    for obj in objects:
+        if obj._data is None:
+            obj.load(lazy=True)
+    cameras = objects[1:]
+    index = range(len(lidar))[index]
+
+    points = lidar._points(index, sensor_id, 'xyz', keep=False).astype(np.float64)
+    boxes = np.array([_image_box(camera, index) for camera in cameras], dtype=np.float64)
+    results = projection_batch(points, np.stack([camera.pose_matrices[index] for camera in cameras]),
+                               [camera.intrinsics for camera in cameras], boxes[:, 2:])
+
+    # squared distance to the center of the decoded area, normalized by its half size
+    scores = np.full((len(cameras), len(points)), np.inf)
+    for c, (points2d, _, indices) in enumerate(results):
+        inside = (points2d[:, 0] >= boxes[c, 0]) & (points2d[:, 1] >= boxes[c, 1])
+        half_size = (boxes[c, 2:] - boxes[c, :2]) / 2.0
+        offsets = (points2d[inside] - boxes[c, :2] - half_size) / half_size
+        scores[c, indices[inside]] = np.sum(offsets ** 2, axis=1)
+    best = np.argmin(scores, axis=0)
+    found = np.isfinite(scores[best, np.arange(len(points))])
+    camera_ids = np.where(found, best, -1).astype(np.int8)
+
+    def sample(c: int) -> Tuple[np.ndarray, np.ndarray]:
+        camera = cameras[c]
+        points2d, _, indices = results[c]
+        chosen = camera_ids[indices] == c
+        points2d, indices = points2d[chosen], indices[chosen]
+        scale, _, _ = camera._decoding
+        box = boxes[c]
+        width, height = max(1, round((box[2] - box[0]) * scale)), max(1, round((box[3] - box[1]) * scale))
+        image = np.empty((height, width, 3), dtype=np.uint8)
+        camera._decode_into(index, image)
+        columns = np.clip(((points2d[:, 0] - box[0]) * (width / (box[2] - box[0]))).astype(np.int64), 0, width - 1)
+        rows = np.clip(((points2d[:, 1] - box[1]) * (height / (box[3] - box[1]))).astype(np.int64), 0, height - 1)
+        return indices, image[rows, columns]
+
+    colors = np.zeros((len(points), 3), dtype=np.uint8)
+    for indices, values in map_ordered(sample, np.unique(camera_ids[found]), workers):
+        colors[indices] = values
+    return colors, camera_ids
+
+
+if __name__ == '__main__':
+    pass
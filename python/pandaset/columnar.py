@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+import glob
+import io
+import json
+import os
+import pickle
+from abc import abstractmethod
+from typing import Dict, List, Tuple, Type
+
+import numpy as np
+import pandas as pd
+from pandas.core.frame import DataFrame
+
+COLUMNAR_DIRECTORY = 'columnar'
+
+
+def columnar_files(directory: str) -> List[str]:
+    """Lists the names of the original files which were converted into a columnar directory.
+
+    Args:
+        directory: Path to a directory written by ``convert_lidar``, ``convert_camera`` or ``convert_annotations``.
+
+    Returns:
+        List of file names in frame order. Empty if the directory was written without a file list.
+    """
+    files_file = f'{directory}/files.json'
+    if not os.path.isfile(files_file):
+        return []
+    with open(files_file, 'r') as f:
+        return json.load(f)
+
+
+def class_labels(classes: pd.Series) -> np.ndarray:
+    """Converts a semantic segmentation `class` column into class IDs.
+
+    Args:
+        classes: Class IDs as numbers or strings of numbers, e.g., the `class` column of a ``SemanticSegmentation`` frame.
+
+    Returns:
+        `uint8` array of class IDs. Missing values are `0`.
+    """
+    codes, uniques = pd.factorize(classes)
+    # missing values have code -1 and map to the appended 0
+    lookup = np.array([int(u) for u in uniques] + [0], dtype=np.uint8)
+    return lookup[codes]
+
+
+def _write_index(output_directory: str, files: List[str], offsets: List[int]) -> None:
+    with open(f'{output_directory}/files.json', 'w') as f:
+        json.dump([os.path.basename(fp) for fp in files], f)
+    # offsets are written last and mark the conversion as complete
+    np.save(f'{output_directory}/offsets.npy', np.array(offsets, dtype=np.int64))
+
+
+def convert_lidar(directory: str, output_directory: str = None) -> str:
+    """Converts all LiDAR point cloud files of a sequence into a columnar, memory-mappable format.
+
+    Points of all frames are concatenated into contiguous arrays, which are stored as `.npy` files together with a per-frame offset index:
+        - `xyzi.npy`: `float32` array of shape `(P, 4)` with columns `x`, `y`, `z`, `i`
+        - `t.npy`: `float64` array of shape `(P,)`
+        - `d.npy`: `uint8` array of shape `(P,)`
+        - `offsets.npy`: `int64` array of shape `(F + 1,)`. Points of frame `k` are in rows `offsets[k]:offsets[k + 1]`.
+
+    The conversion only has to be done once. Afterwards, ``Lidar`` detects the `columnar/` directory and memory-maps frames from it instead of unpickling the original files.
+
+    Args:
+        directory: Path to the `lidar/` directory of a sequence.
+        output_directory: Path to write the columnar files to. Defaults to `{directory}/columnar`, which is where ``Lidar`` looks for it.
+
+    Returns:
+        Path of the output directory.
+
+    Examples:
+        >>> convert_lidar('/data/pandaset/002/lidar')
+        '/data/pandaset/002/lidar/columnar'
+        >>> for sequence in pandaset.sequences():
+        >>>     convert_lidar(f'/data/pandaset/{sequence}/lidar')
+    """
+    if output_directory is None:
+        output_directory = f'{directory}/{COLUMNAR_DIRECTORY}'
+    os.makedirs(output_directory, exist_ok=True)
+
+    xyzi, t, d = [], [], []
+    offsets = [0]
+    files = sorted(glob.glob(f'{directory}/*.pkl.gz'))
+    for fp in files:
+        df = pd.read_pickle(fp)
+        if not np.array_equal(df.index.to_numpy(), np.arange(len(df))):
+            raise ValueError(f'Point cloud `{fp}` does not have a contiguous index and cannot be converted.')
+        xyzi.append(df[['x', 'y', 'z', 'i']].to_numpy(dtype=np.float32))
+        t.append(df['t'].to_numpy(dtype=np.float64))
+        d.append(df['d'].to_numpy(dtype=np.uint8))
+        offsets.append(offsets[-1] + len(df))
+
+    np.save(f'{output_directory}/xyzi.npy', np.concatenate(xyzi) if xyzi else np.empty((0, 4), dtype=np.float32))
+    np.save(f'{output_directory}/t.npy', np.concatenate(t) if t else np.empty(0, dtype=np.float64))
+    np.save(f'{output_directory}/d.npy', np.concatenate(d) if d else np.empty(0, dtype=np.uint8))
+    _write_index(output_directory, files, offsets)
+    return output_directory
+
+
+def convert_camera(directory: str, output_directory: str = None) -> str:
+    """Converts all images of a camera into a single file of concatenated JPEG bytes.
+
+    Images are not decoded or re-encoded. The output directory contains:
+        - `images.bin`: JPEG bytes of all frames
+        - `offsets.npy`: `int64` array of shape `(F + 1,)`. Bytes of frame `k` are at `offsets[k]:offsets[k + 1]`.
+
+    Afterwards, ``Camera`` detects the `columnar/` directory and reads images from it instead of opening the original files.
+
+    Args:
+        directory: Path to a camera directory of a sequence, e.g., `camera/front_camera/`.
+        output_directory: Path to write the columnar files to. Defaults to `{directory}/columnar`, which is where ``Camera`` looks for it.
+
+    Returns:
+        Path of the output directory.
+    """
+    if output_directory is None:
+        output_directory = f'{directory}/{COLUMNAR_DIRECTORY}'
+    os.makedirs(output_directory, exist_ok=True)
+
+    offsets = [0]
+    files = sorted(glob.glob(f'{directory}/*.jpg'))
+    with open(f'{output_directory}/images.bin', 'wb') as out:
+        for fp in files:
+            with open(fp, 'rb') as f:
+                offsets.append(offsets[-1] + out.write(f.read()))
+    _write_index(output_directory, files, offsets)
+    return output_directory
+
+
+def _codes_dtype(categories: int) -> np.dtype:
+    # smallest signed type which holds all codes and the missing value code -1
+    for dtype in [np.int8, np.int16, np.int32]:
+        if categories <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def convert_annotations(directory: str, output_directory: str = None) -> str:
+    """Converts all annotation files of a sequence into one memory-mappable array per column.
+
+    Data frames of all frames are concatenated in frame order. Numeric and boolean columns are stored as arrays of their type,
+    all other columns are dictionary-encoded as integer codes and a small vocabulary of distinct values. The output directory contains:
+        - `columns.json`: Column names and encodings, and the index name
+        - `column_{k}.npy`: Values or codes of the `k`-th column, of shape `(P,)`
+        - `vocabularies.pkl`: Distinct values of dictionary-encoded columns
+        - `index.npy`: Only if the index of a frame is not `0, ..., n - 1`, `int64` array of shape `(P,)` with the index of every row
+        - `labels.npy`: Only for semantic segmentation, `uint8` array of shape `(P,)` with the class ID of every point
+        - `offsets.npy`: `int64` array of shape `(F + 1,)`. Rows of frame `k` are at positions `offsets[k]:offsets[k + 1]`.
+
+    Afterwards, ``Cuboids`` and ``SemanticSegmentation`` detect the `columnar/` directory and read frames from it instead of unpickling the original files.
+
+    Args:
+        directory: Path to an annotation directory of a sequence, e.g., `annotations/cuboids/`.
+        output_directory: Path to write the columnar files to. Defaults to `{directory}/columnar`, which is where annotations look for it.
+
+    Returns:
+        Path of the output directory.
+    """
+    if output_directory is None:
+        output_directory = f'{directory}/{COLUMNAR_DIRECTORY}'
+    os.makedirs(output_directory, exist_ok=True)
+
+    frames = []
+    offsets = [0]
+    files = sorted(glob.glob(f'{directory}/*.pkl.gz'))
+    for fp in files:
+        frames.append(pd.read_pickle(fp))
+        offsets.append(offsets[-1] + len(frames[-1]))
+    table = pd.concat(frames) if frames else pd.DataFrame()
+    range_index = all(np.array_equal(df.index.to_numpy(), np.arange(len(df))) for df in frames)
+    index_name = frames[0].index.name if frames else None
+    del frames
+
+    columns = []
+    vocabularies = {}
+    for k, (name, column) in enumerate(table.items()):
+        if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+            np.save(f'{output_directory}/column_{k}.npy', column.to_numpy())
+            columns.append({'name': name, 'encoding': 'values'})
+        else:
+            codes, uniques = pd.factorize(column)
+            np.save(f'{output_directory}/column_{k}.npy', codes.astype(_codes_dtype(len(uniques))))
+            vocabularies[k] = np.asarray(uniques, dtype=object)
+            columns.append({'name': name, 'encoding': 'codes'})
+    with open(f'{output_directory}/vocabularies.pkl', 'wb') as f:
+        pickle.dump(vocabularies, f)
+    if not range_index:
+        np.save(f'{output_directory}/index.npy', table.index.to_numpy(dtype=np.int64))
+    with open(f'{output_directory}/columns.json', 'w') as f:
+        json.dump({'columns': columns, 'index_name': index_name}, f)
+    if list(table.columns) == ['class']:
+        np.save(f'{output_directory}/labels.npy', class_labels(table['class']))
+    _write_index(output_directory, files, offsets)
+    return output_directory
+
+
+class _Columns:
+    @property
+    def offsets(self) -> np.ndarray:
+        """Offset index of shape `(F + 1,)`. Frame `k` is stored at `offsets[k]:offsets[k + 1]`."""
+        return self._offsets
+
+    @property
+    def files(self) -> List[str]:
+        """Names of the original files in frame order. Empty if the directory was written without a file list."""
+        return self._files
+
+    def __init__(self, directory: str) -> None:
+        self._directory: str = directory
+        self._offsets: np.ndarray = np.load(f'{directory}/offsets.npy')
+        self._files: List[str] = columnar_files(directory)
+
+    def __getstate__(self) -> Dict:
+        # re-open files in other processes instead of copying their content
+        return {'directory': self._directory}
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__init__(state['directory'])
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+
+class LidarColumns(_Columns):
+    """Reads LiDAR point clouds from the columnar format written by ``convert_lidar``.
+
+    All arrays are memory-mapped read-only, so frames are zero-copy views into the page cache, which is shared between processes reading the same sequence.
+
+    Args:
+         directory: Path to a directory written by ``convert_lidar``.
+    """
+
+    @property
+    def xyzi(self) -> np.ndarray:
+        """Memory-mapped `x`, `y`, `z`, `i` columns of all frames as `float32` array of shape `(P, 4)`."""
+        return self._xyzi
+
+    @property
+    def t(self) -> np.ndarray:
+        """Memory-mapped point timestamps of all frames as `float64` array of shape `(P,)`."""
+        return self._t
+
+    @property
+    def d(self) -> np.ndarray:
+        """Memory-mapped sensor IDs of all frames as `uint8` array of shape `(P,)`."""
+        return self._d
+
+    def __init__(self, directory: str) -> None:
+        super().__init__(directory)
+        self._xyzi: np.ndarray = np.load(f'{directory}/xyzi.npy', mmap_mode='r')
+        self._t: np.ndarray = np.load(f'{directory}/t.npy', mmap_mode='r')
+        self._d: np.ndarray = np.load(f'{directory}/d.npy', mmap_mode='r')
+
+    def frame(self, index: int) -> DataFrame:
+        """Returns a single point cloud frame.
+
+        Args:
+            index: Frame index
+
+        Returns:
+            Point cloud data frame with the same columns as ``Lidar.data``. Columns are read-only views on the memory-mapped arrays; `x`, `y`, `z`, `i` are `float32`, `t` is `float64` and `d` is `uint8`.
+        """
+        start, end = self._offsets[index], self._offsets[index + 1]
+        xyzi = self._xyzi[start:end]
+        return pd.DataFrame({'x': xyzi[:, 0],
+                             'y': xyzi[:, 1],
+                             'z': xyzi[:, 2],
+                             'i': xyzi[:, 3],
+                             't': self._t[start:end],
+                             'd': self._d[start:end]},
+                            index=pd.RangeIndex(end - start, name='index'),
+                            copy=False)
+
+
+class ImageColumns(_Columns):
+    """Reads camera images from the columnar format written by ``convert_camera``.
+
+    The concatenated JPEG bytes are memory-mapped read-only, so reading a frame needs no file open and is safe from multiple threads.
+
+    Args:
+         directory: Path to a directory written by ``convert_camera``.
+    """
+
+    def __init__(self, directory: str) -> None:
+        super().__init__(directory)
+        # empty files cannot be memory-mapped
+        self._bytes: np.ndarray = np.memmap(f'{directory}/images.bin', dtype=np.uint8, mode='r') \
+            if self._offsets[-1] > 0 else np.empty(0, dtype=np.uint8)
+
+    def frame(self, index: int) -> io.BytesIO:
+        """Returns the JPEG bytes of a single frame.
+
+        Args:
+            index: Frame index
+
+        Returns:
+            File-like object which can be opened with `PIL.Image.open`.
+        """
+        return io.BytesIO(self._bytes[self._offsets[index]:self._offsets[index + 1]])
+
+
+class TableColumns(_Columns):
+    """Reads annotations from the columnar format written by ``convert_annotations``.
+
+    All column arrays are memory-mapped read-only, so a single frame is read by slicing each column at its offsets, without reading other frames.
+    Class IDs of semantic segmentation are memory-mapped separately.
+
+    Args:
+         directory: Path to a directory written by ``convert_annotations``.
+    """
+
+    @property
+    def table(self) -> DataFrame:
+        """Data frame of all frames concatenated in frame order. Dictionary-encoded columns are categoricals, which are built from the codes without decoding values."""
+        columns = {}
+        for k, (name, encoding) in enumerate(self._encodings):
+            if encoding == 'codes':
+                columns[name] = pd.Categorical.from_codes(self._arrays[k], categories=pd.Index(self._vocabularies[k][:-1]))
+            else:
+                columns[name] = self._arrays[k]
+        return pd.DataFrame(columns, index=self._table_index(), copy=False)
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Memory-mapped class IDs of all frames as `uint8` array of shape `(P,)`, or `None` if the table is not a semantic segmentation."""
+        return self._labels
+
+    def __init__(self, directory: str) -> None:
+        super().__init__(directory)
+        with open(f'{directory}/columns.json', 'r') as f:
+            header = json.load(f)
+        self._encodings: List[Tuple[str, str]] = [(c['name'], c['encoding']) for c in header['columns']]
+        self._index_name: str = header['index_name']
+        with open(f'{directory}/vocabularies.pkl', 'rb') as f:
+            vocabularies = pickle.load(f)
+        # missing values have code -1 and are decoded to the appended `None`
+        self._vocabularies: Dict[int, np.ndarray] = {k: np.append(v, None) for k, v in vocabularies.items()}
+        self._arrays: List[np.ndarray] = [np.load(f'{directory}/column_{k}.npy', mmap_mode='r') for k in range(len(self._encodings))]
+        index_file = f'{directory}/index.npy'
+        self._index: np.ndarray = np.load(index_file, mmap_mode='r') if os.path.isfile(index_file) else None
+        labels_file = f'{directory}/labels.npy'
+        self._labels: np.ndarray = np.load(labels_file, mmap_mode='r') if os.path.isfile(labels_file) else None
+
+    def frame(self, index: int) -> DataFrame:
+        """Returns a single annotation frame.
+
+        Args:
+            index: Frame index
+
+        Returns:
+            Data frame with the same columns and index as the original annotation file. Missing values of non-numeric columns are `None`.
+        """
+        start, end = self._offsets[index], self._offsets[index + 1]
+        columns = {}
+        for k, (name, encoding) in enumerate(self._encodings):
+            values = self._arrays[k][start:end]
+            columns[name] = self._vocabularies[k][values] if encoding == 'codes' else values
+        index = pd.Index(self._index[start:end], name=self._index_name) if self._index is not None else \
+            pd.RangeIndex(end - start, name=self._index_name)
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def _table_index(self) -> pd.Index:
+        if self._index is not None:
+            return pd.Index(self._index, name=self._index_name)
+        # the index of every frame restarts at 0
+        index = np.arange(self._offsets[-1]) - np.repeat(self._offsets[:-1], np.diff(self._offsets))
+        return pd.Index(index, name=self._index_name)
+
+
+class _ColumnarSource:
+    """Base class of sensors and annotations, which read frames from a columnar copy in their `columnar/` directory if there is one.
+
+    Subclasses provide the reader class of their columnar format as ``_columns_reader``.
+    """
+
+    @property
+    @abstractmethod
+    def _columns_reader(self) -> Type[_Columns]:
+        ...
+
+    def _load_columns_structure(self) -> None:
+        columns_directory = f'{self._directory}/{COLUMNAR_DIRECTORY}'
+        if os.path.isfile(f'{columns_directory}/offsets.npy'):
+            self._columns_structure = columns_directory
+            if not self._data_structure:
+                # original files are not needed after repacking
+                self._data_structure = [f'{self._directory}/{f}' for f in columnar_files(columns_directory)]
+
+    def _load_columns(self) -> None:
+        if self._columns_structure is not None:
+            columns = self._columns_reader(self._columns_structure)
+            # ignore a columnar copy which is out of date with the original files
+            if len(columns) == len(self._data_structure):
+                self._columns = columns
+
+
+if __name__ == '__main__':
+    pass
@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
-from typing import overload, List, Dict
+import json
+import os
+import warnings
+from typing import overload, List, Dict, Tuple, Union
 
+from .cache import FrameCache
 from .sequence import Sequence
 from .utils import subdirectories
 
+MANIFEST_FILENAME = 'pandaset_manifest.json'
+MANIFEST_VERSION = 2
+
 
 class DataSet:
     """Top-level class to load PandaSet
@@ -13,14 +20,29 @@ class DataSet:
 
         Args:
              directory: Absolute or relative path where PandaSet has been extracted to.
+             cache_size: Optional memory budget in bytes. If set, all sequences share one ``FrameCache`` which holds frames loaded with `lazy=True` and evicts least recently used frames.
+             manifest: Set `True` to use a manifest file `pandaset_manifest.json` in `directory`, or a path to a manifest file at another location.
+                 The manifest lists all sequences and their files, so only a single file is read on initialization instead of searching all sequence directories.
+                 It is validated against the sequence directory names and the modification times of all sequence directories, and rebuilt automatically if files were added or removed.
 
         Examples:
             >>> pandaset = DataSet('/data/pandaset')
             >>> s = pandaset['002']
         """
 
-    def __init__(self, directory: str) -> None:
+    @property
+    def cache(self) -> FrameCache:
+        """ Stores the ``FrameCache`` shared by all sequences
+
+        Returns:
+            Instance of ``FrameCache`` class, or `None` if no `cache_size` was set.
+        """
+        return self._cache
+
+    def __init__(self, directory: str, cache_size: int = None, manifest: Union[bool, str] = False) -> None:
         self._directory: str = directory
+        self._cache: FrameCache = FrameCache(cache_size) if cache_size is not None else None
+        self._manifest_file: str = f'{directory}/{MANIFEST_FILENAME}' if manifest is True else (manifest or None)
         self._sequences: Dict[str, Sequence] = None
         self._load_sequences()
 
@@ -29,10 +51,44 @@ class DataSet:
 
     def _load_sequences(self) -> None:
         self._sequences = {}
+        manifest = self._read_manifest() if self._manifest_file else None
+        if manifest is not None:
+            for seq_id, structure in manifest['sequences'].items():
+                self._sequences[seq_id] = Sequence(os.path.join(self._directory, seq_id), self._cache, structure)
+            return
+
         sequence_directories = subdirectories(self._directory)
         for sd in sequence_directories:
             seq_id = sd.split('/')[-1].split('\\')[-1]
-            self._sequences[seq_id] = Sequence(sd)
+            self._sequences[seq_id] = Sequence(sd, self._cache)
+        if self._manifest_file:
+            self._write_manifest()
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self._manifest_file, 'r') as f:
+                manifest = json.load(f)
+            # the manifest may be stored in the dataset directory itself, so its modification time is not usable
+            sequence_ids = [sd.split('/')[-1].split('\\')[-1] for sd in subdirectories(self._directory)]
+            if manifest['version'] != MANIFEST_VERSION or sorted(sequence_ids) != sorted(manifest['sequences']):
+                return None
+            for seq_id, structure in manifest['sequences'].items():
+                for d, mtime in structure['directories'].items():
+                    if os.stat(os.path.join(self._directory, seq_id, d)).st_mtime_ns != mtime:
+                        return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return manifest
+
+    def _write_manifest(self) -> None:
+        manifest = {'version': MANIFEST_VERSION,
+                    'sequences': {seq_id: seq._dump_structure() for seq_id, seq in self._sequences.items()}}
+        try:
+            with open(f'{self._manifest_file}.tmp', 'w') as f:
+                json.dump(manifest, f)
+            os.replace(f'{self._manifest_file}.tmp', self._manifest_file)
+        except OSError as e:
+            warnings.warn(f'Could not write manifest file `{self._manifest_file}`: {e}')
 
     def sequences(self, with_semseg: bool = False) -> List[str]:
         """ Lists all available sequence names
@@ -55,11 +111,31 @@ class DataSet:
         else:
             return list(self._sequences.keys())
 
+    def frame_index(self, with_semseg: bool = False) -> List[Tuple[str, int]]:
+        """ Lists all frames of all available sequences
+
+        The position in the returned list serves as a global frame index over the complete dataset, e.g., for shuffling frames across sequences.
+
+        Args:
+            with_semseg: Set `True` if only frames of sequences with semantic segmentation annotations should be returned.
+
+        Returns:
+            List of `(sequence name, frame index)` tuples, ordered by sequence and frame.
+
+        Examples:
+            >>> pandaset = DataSet('/data/pandaset', manifest=True)
+            >>> index = pandaset.frame_index()
+            >>> sequence, frame = index[1234]
+            >>> pc = pandaset[sequence].load_lidar(lazy=True).lidar[frame]
+        """
+        return [(s, f) for s in sorted(self.sequences(with_semseg)) for f in range(len(self._sequences[s].lidar))]
+
     def unload(self, sequence: str):
         """ Removes all sequence file data from memory if previously loaded from disk.
 
         This is useful if you intend to iterate over all sequences and perform some
         operation. If you do not unload the sequences, it quickly leads to sigkill.
+        Alternatively, set `cache_size` on the ``DataSet`` and load sequences with `lazy=True` to keep memory bounded.
 
         Args:
             sequence: The sequence name
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import numpy as np
+
+from .sensors import Camera
+
+
+class CameraBatchDecoder:
+    """Decodes camera images of any cameras and frames into one reusable `uint8` array.
+
+    Images are decoded straight into slots of a preallocated buffer of shape `(B, H, W, 3)`, so there are no per-image arrays to allocate, keep and stack.
+    The buffer is reused by following calls with the same image size and at most the same batch size. JPEG decoding releases the GIL,
+    so images are decoded in parallel by a thread pool which is kept for the lifetime of the decoder.
+
+    Each ``Camera`` decodes with its own ``Camera.set_decoding`` scale and crop box, which must result in the same image size for all items of a batch.
+    Images already loaded into a ``Camera`` are copied instead of decoded again.
+
+    Args:
+        workers: Number of decoding threads. If `None` or smaller than `2`, images are decoded in the calling thread.
+
+    Examples:
+        >>> decoder = CameraBatchDecoder(workers=6)
+        >>> for index in range(len(s.lidar)):
+        >>>     images = decoder.decode([(camera, index) for camera in s.camera.values()])
+        >>>     print(images.shape)
+        (6, 1080, 1920, 3)
+    """
+
+    @property
+    def buffer(self) -> np.ndarray:
+        """Currently allocated buffer of shape `(B, H, W, 3)`, or `None` before the first call of ``decode``."""
+        return self._buffer
+
+    def __init__(self, workers: int = None) -> None:
+        self._workers: int = workers
+        self._buffer: np.ndarray = None
+        self._pool: ThreadPoolExecutor = None
+
+    def __enter__(self) -> 'CameraBatchDecoder':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def decode(self, items: List[Tuple[Camera, int]], out: np.ndarray = None) -> np.ndarray:
+        """Decodes camera images into a single array.
+
+        Args:
+            items: Pairs of ``Camera`` object and frame index to decode, in batch order.
+            out: Optional `uint8` array of shape `(len(items), H, W, 3)` to decode into, e.g., pinned memory of a deep learning framework. Defaults to the internal buffer.
+
+        Returns:
+            Array of shape `(len(items), H, W, 3)`. If `out` is not given, this is a view on the internal buffer and is overwritten by the next call of ``decode``.
+        """
+        if out is None:
+            out = self._batch_buffer(items)
+        elif out.dtype != np.uint8 or out.ndim != 4 or len(out) != len(items):
+            raise ValueError(f'Output array of shape {out.shape} and type `{out.dtype}` does not fit {len(items)} images.')
+
+        if self._workers is None or self._workers < 2 or len(items) < 2:
+            for slot, (camera, index) in zip(out, items):
+                camera._decode_into(index, slot)
+            return out
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self._workers)
+        futures = [self._pool.submit(camera._decode_into, index, slot) for slot, (camera, index) in zip(out, items)]
+        for future in futures:
+            future.result()
+        return out
+
+    def close(self) -> None:
+        """Shuts down decoding threads and releases the buffer."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._buffer = None
+
+    def _batch_buffer(self, items: List[Tuple[Camera, int]]) -> np.ndarray:
+        if not items:
+            return np.empty((0, 0, 0, 3), dtype=np.uint8)
+        camera, index = items[0]
+        width, height = camera._decoded_size(index)
+        if self._buffer is None or self._buffer.shape[1:3] != (height, width) or len(self._buffer) < len(items):
+            self._buffer = np.empty((len(items), height, width, 3), dtype=np.uint8)
+        return self._buffer[:len(items)]
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import os
+from typing import List
+
+import numpy as np
+
+from .geometry import _BOX_COLUMNS, center_boxes_to_corners
+
+
+def _save(path: str, array: np.ndarray) -> None:
+    # write to a temporary file first, so concurrent readers never see partial files
+    with open(f'{path}.tmp', 'wb') as f:
+        np.save(f, array)
+    os.replace(f'{path}.tmp', path)
+
+
+class EgoFrames:
+    """Provides LiDAR points and cuboids of a sequence in ego-coordinates, i.e., in the coordinate system of the LiDAR of the same frame.
+
+    Points and cuboids are stored in world-coordinates. Here, they are transformed only once per frame with the inverse poses of ``Lidar.inverse_pose_matrices``,
+    and the results are kept for later calls, so repeated epochs do not redo the rigid transforms. Cuboids of all frames are transformed in a single vectorized pass over ``Cuboids.table``.
+
+    Results are kept in memory by default. With `directory`, they are written to `.npy` files there instead and read back memory-mapped,
+    which persists them across processes and runs. The directory must only be used for a single sequence.
+
+    Returned arrays are shared with the cache and must not be modified.
+
+    Args:
+        sequence: Sequence to convert. LiDAR and cuboids are loaded lazily if they have not been loaded before.
+        directory: Optional directory for the on-disk cache. Created if it does not exist.
+
+    Examples:
+        >>> points = s.ego.points(0, sensor_id=0)
+        >>> boxes = s.ego.boxes(0)
+        >>> corners = s.ego.corners(0)
+    """
+
+    def __init__(self, sequence, directory: str = None) -> None:
+        self._sequence = sequence
+        self._directory: str = directory
+        self._points: List[np.ndarray] = None
+        self._boxes: np.ndarray = None
+        self._corners: np.ndarray = None
+        self._offsets: np.ndarray = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self._directory is not None:
+            # memory-mapped arrays are opened again from the directory
+            state.update(_points=None, _boxes=None, _corners=None, _offsets=None)
+        return state
+
+    def points(self, index: int, sensor_id: int = None, columns: str = 'xyz') -> np.ndarray:
+        """Returns the points of a single frame in ego-coordinates as `float32` array, or as `float64` array if `columns` contains `t`.
+
+        Args:
+            index: Frame index
+            sensor_id: Set `-1` for both LiDAR sensors, set `0` for mechanical 360° LiDAR, set `1` for front-facing LiDAR. Defaults to the sensor chosen with ``Lidar.set_sensor``.
+            columns: Point cloud columns to return, starting with `'xyz'`, see ``Lidar.points``. Columns other than `'xyz'` are copied from ``Lidar.points``.
+
+        Returns:
+            Array of shape `(N, len(columns))` with the dtype of ``Lidar.points``, aligned with ``Lidar.points``.
+        """
+        if not columns.startswith('xyz'):
+            raise ValueError(f'Invalid columns `{columns}`. Columns must start with `xyz`.')
+        lidar = self._lidar()
+        index = range(len(lidar))[index]
+        sensor_id = lidar._sensor_id if sensor_id is None else sensor_id
+        ego_points = self._ego_points(index)
+        xyz = ego_points[lidar._point_rows(index, sensor_id)]
+        if columns == 'xyz':
+            return xyz
+        points = np.array(lidar._points(index, sensor_id, columns, keep=False))
+        points[:, :3] = xyz
+        return points
+
+    def boxes(self, index: int) -> np.ndarray:
+        """Returns the cuboids of a single frame in ego-coordinates.
+
+        Args:
+            index: Frame index
+
+        Returns:
+            `float32` array of shape `(M, 7)` with rows `(pos_x, pos_y, pos_z, dim_x, dim_y, dim_z, yaw)`, in the row order of ``Cuboids.data``.
+            Positions and yaw are in ego-coordinates, the yaw of tilted LiDAR poses is measured in the ego `xy`-plane.
+        """
+        self._load_cuboids()
+        index = range(len(self._offsets) - 1)[index]
+        return self._boxes[self._offsets[index]:self._offsets[index + 1]]
+
+    def corners(self, index: int) -> np.ndarray:
+        """Returns the corners of the cuboids of a single frame in ego-coordinates.
+
+        Corners are transformed from world-coordinates, so they are exact for tilted LiDAR poses as well.
+
+        Args:
+            index: Frame index
+
+        Returns:
+            `float32` array of shape `(M, 8, 3)` in the corner order of ``geometry.center_box_to_corners``.
+        """
+        self._load_cuboids()
+        index = range(len(self._offsets) - 1)[index]
+        return self._corners[self._offsets[index]:self._offsets[index + 1]]
+
+    def _lidar(self):
+        lidar = self._sequence.lidar
+        if lidar._data is None:
+            lidar.load(lazy=True)
+        if self._points is None:
+            self._points = [None] * len(lidar)
+        return lidar
+
+    def _ego_points(self, index: int) -> np.ndarray:
+        points = self._points[index]
+        if points is not None:
+            return points
+        path = f'{self._directory}/lidar_{index:02d}.npy' if self._directory is not None else None
+        if path is not None and os.path.isfile(path):
+            points = np.load(path, mmap_mode='r')
+        else:
+            lidar = self._sequence.lidar
+            transform = lidar.inverse_pose_matrices[index]
+            if lidar._columns is None:
+                # sensor IDs are read with the same file, so ``Lidar._point_rows`` does not read the frame again
+                # transform before casting, world-coordinates lose precision in `float32`
+                xyzd = lidar._points(index, -1, 'xyzd', keep=False, dtype=np.float64)
+                lidar._sensor_rows(index, xyzd[:, 3], 0)
+                xyz = xyzd[:, :3]
+            else:
+                xyz = lidar._points(index, -1, 'xyz', keep=False, dtype=np.float64)
+            points = (xyz @ transform[:3, :3].T + transform[:3, 3]).astype(np.float32)
+            if path is not None:
+                _save(path, points)
+                points = np.load(path, mmap_mode='r')
+        self._points[index] = points
+        return points
+
+    def _load_cuboids(self) -> None:
+        if self._offsets is not None:
+            return
+        if self._directory is not None and os.path.isfile(f'{self._directory}/cuboids_offsets.npy'):
+            self._boxes = np.load(f'{self._directory}/cuboids_boxes.npy', mmap_mode='r')
+            self._corners = np.load(f'{self._directory}/cuboids_corners.npy', mmap_mode='r')
+            self._offsets = np.load(f'{self._directory}/cuboids_offsets.npy')
+            return
+
+        lidar = self._lidar()
+        cuboids = self._sequence.cuboids
+        if cuboids._data is None:
+            cuboids.load(lazy=True)
+        table = cuboids.table
+        frames = table['frame'].to_numpy()
+        world_boxes = table[_BOX_COLUMNS].to_numpy(dtype=np.float64)
+        transforms = lidar.inverse_pose_matrices[frames]
+        rotations, translations = transforms[:, :3, :3], transforms[:, :3, 3]
+
+        boxes = np.empty((len(table), 7), dtype=np.float32)
+        boxes[:, :3] = np.einsum('nij,nj->ni', rotations, world_boxes[:, :3]) + translations
+        boxes[:, 3:6] = world_boxes[:, 3:6]
+        # rotate the heading vector of each cuboid, which handles any LiDAR orientation
+        headings = np.stack([np.cos(world_boxes[:, 6]), np.sin(world_boxes[:, 6])], axis=1)
+        headings = np.einsum('nij,nj->ni', rotations[:, :2, :2], headings)
+        boxes[:, 6] = np.arctan2(headings[:, 1], headings[:, 0])
+        corners = np.einsum('nij,nkj->nki', rotations, center_boxes_to_corners(world_boxes)) + translations[:, np.newaxis]
+        corners = corners.astype(np.float32)
+        offsets = np.searchsorted(frames, np.arange(len(lidar) + 1)).astype(np.int64)
+
+        if self._directory is not None:
+            _save(f'{self._directory}/cuboids_boxes.npy', boxes)
+            _save(f'{self._directory}/cuboids_corners.npy', corners)
+            # offsets are written last and mark the cache as complete
+            _save(f'{self._directory}/cuboids_offsets.npy', offsets)
+        self._boxes, self._corners, self._offsets = boxes, corners, offsets
+
+
+if __name__ == '__main__':
+    pass
@@ -1,34 +1,91 @@
+import os
+from functools import lru_cache
+
 import numpy as np
-import transforms3d as t3d
+import pandas as pd
 
-from .sensors import Lidar
-from .sensors import Camera
+PANDAR64_CHANNELS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'pandar64_channel_distribution.csv')
 
 
-def _heading_position_to_mat(heading, position):
-    quat = np.array([heading["w"], heading["x"], heading["y"], heading["z"]])
-    pos = np.array([position["x"], position["y"], position["z"]])
-    transform_matrix = t3d.affines.compose(np.array(pos),
-                                           t3d.quaternions.quat2mat(quat),
-                                           [1.0, 1.0, 1.0])
+def _quaternions_to_mat(quats):
+    # vectorized equivalent of transforms3d.quaternions.quat2mat for (F, 4) quaternions in (w, x, y, z) order
+    quats = np.asarray(quats, dtype=np.float64)
+    norm = np.sum(quats * quats, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(norm > np.finfo(np.float64).eps, 2.0 / norm, 0.0)
+    w, x, y, z = np.moveaxis(quats, -1, 0)
+    rotation = np.empty(quats.shape[:-1] + (3, 3), dtype=np.float64)
+    rotation[..., 0, 0] = 1.0 - s * (y * y + z * z)
+    rotation[..., 0, 1] = s * (x * y - w * z)
+    rotation[..., 0, 2] = s * (x * z + w * y)
+    rotation[..., 1, 0] = s * (x * y + w * z)
+    rotation[..., 1, 1] = 1.0 - s * (x * x + z * z)
+    rotation[..., 1, 2] = s * (y * z - w * x)
+    rotation[..., 2, 0] = s * (x * z - w * y)
+    rotation[..., 2, 1] = s * (y * z + w * x)
+    rotation[..., 2, 2] = 1.0 - s * (x * x + y * y)
+    return rotation
+
+
+def poses_to_mat(poses):
+    """Converts a list of pose dictionaries into stacked transformation matrices.
+
+    Args:
+        poses: List of `F` pose dictionaries with `position` and `heading` keys, as returned by ``Lidar.poses`` or ``Camera.poses``.
+
+    Returns:
+        Array of shape `(F, 4, 4)` with one sensor-to-world transformation matrix per pose.
+    """
+    quats = np.array([[p['heading']['w'], p['heading']['x'], p['heading']['y'], p['heading']['z']] for p in poses],
+                     dtype=np.float64).reshape(-1, 4)
+    positions = np.array([[p['position']['x'], p['position']['y'], p['position']['z']] for p in poses],
+                         dtype=np.float64).reshape(-1, 3)
+    transform_matrix = np.zeros((len(quats), 4, 4), dtype=np.float64)
+    transform_matrix[:, :3, :3] = _quaternions_to_mat(quats)
+    transform_matrix[:, :3, 3] = positions
+    transform_matrix[:, 3, 3] = 1.0
     return transform_matrix
 
 
-def projection(lidar_points, camera_data, camera_pose, camera_intrinsics, filter_outliers=True):
-    camera_heading = camera_pose['heading']
-    camera_position = camera_pose['position']
-    camera_pose_mat = _heading_position_to_mat(camera_heading, camera_position)
+def _heading_position_to_mat(heading, position):
+    return poses_to_mat([{'heading': heading, 'position': position}])[0]
 
-    trans_lidar_to_camera = np.linalg.inv(camera_pose_mat)
-    points3d_lidar = lidar_points
-    points3d_camera = trans_lidar_to_camera[:3, :3] @ (points3d_lidar.T) + \
-                        trans_lidar_to_camera[:3, 3].reshape(3, 1)
 
+def _pose_to_mat(pose):
+    # accepts a pose dictionary or an already converted 4x4 matrix
+    if isinstance(pose, dict):
+        return _heading_position_to_mat(pose['heading'], pose['position'])
+    return np.asarray(pose, dtype=np.float64)
+
+
+def _rigid_inverse(transform_matrix):
+    # closed-form inverse of (stacked) rigid transformations: [R | t]^-1 = [R^T | -R^T t]
+    rotation_t = np.swapaxes(transform_matrix[..., :3, :3], -1, -2)
+    inverse = np.zeros_like(transform_matrix)
+    inverse[..., :3, :3] = rotation_t
+    inverse[..., :3, 3] = -(rotation_t @ transform_matrix[..., :3, [3]])[..., 0]
+    inverse[..., 3, 3] = 1.0
+    return inverse
+
+
+def _intrinsics_to_mat(camera_intrinsics):
     K = np.eye(3, dtype=np.float64)
     K[0, 0] = camera_intrinsics.fx
     K[1, 1] = camera_intrinsics.fy
     K[0, 2] = camera_intrinsics.cx
     K[1, 2] = camera_intrinsics.cy
+    return K
+
+
+def projection(lidar_points, camera_data, camera_pose, camera_intrinsics, filter_outliers=True):
+    camera_pose_mat = _pose_to_mat(camera_pose)
+
+    trans_lidar_to_camera = _rigid_inverse(camera_pose_mat)
+    points3d_lidar = lidar_points
+    points3d_camera = trans_lidar_to_camera[:3, :3] @ (points3d_lidar.T) + \
+                        trans_lidar_to_camera[:3, 3].reshape(3, 1)
+
+    K = _intrinsics_to_mat(camera_intrinsics)
 
     inliner_indices_arr = np.arange(points3d_camera.shape[1])
     if filter_outliers:
@@ -50,10 +107,147 @@ def projection(lidar_points, camera_data, camera_pose, camera_intrinsics, filter
     return points2d_camera, points3d_camera, inliner_indices_arr
 
 
+def projection_batch(lidar_points, camera_poses, camera_intrinsics, image_sizes, filter_outliers=True):
+    """Projects points into several cameras and frames at once.
+
+    Points of each frame are transformed into all cameras in one vectorized operation, including depth test and image bounds filtering.
+    Results per camera are the same as from calling ``projection`` for every camera and frame, except that `points3d` always has shape `(M, 3)`,
+    while ``projection`` returns it transposed with shape `(3, N)` if `filter_outliers` is `False`.
+
+    Args:
+        lidar_points: Points in world coordinates as array of shape `(N, 3)`, or a list of `F` such arrays, one per frame.
+        camera_poses: Camera pose matrices in world coordinates of shape `(C, 4, 4)` for a single frame, or `(F, C, 4, 4)` for `F` frames.
+        camera_intrinsics: List of `C` ``Intrinsics``, one per camera.
+        image_sizes: List of `C` image sizes as `(width, height)`, one per camera.
+        filter_outliers: If `True`, only points in front of the camera and inside the image are returned.
+
+    Returns:
+        For a single frame, a list with a tuple `(points2d, points3d, indices)` per camera: image coordinates `(M, 2)`, camera coordinates `(M, 3)`
+        and the indices `(M,)` of the projected points in `lidar_points`. For `F` frames, a list of such lists, one per frame.
+
+    Examples:
+        >>> cameras = [s.camera[name] for name in s.camera.keys()]
+        >>> poses = np.stack([cam.pose_matrices for cam in cameras], axis=1)
+        >>> results = projection_batch([pc[['x', 'y', 'z']].values for pc in s.lidar[:]], poses,
+        >>>                            [cam.intrinsics for cam in cameras], [cam[0].size for cam in cameras])
+    """
+    camera_poses = np.asarray(camera_poses, dtype=np.float64)
+    single_frame = camera_poses.ndim == 3
+    if single_frame:
+        camera_poses = camera_poses[np.newaxis]
+    if isinstance(lidar_points, np.ndarray):
+        lidar_points = [lidar_points] * len(camera_poses)
+    if len(lidar_points) != len(camera_poses):
+        raise ValueError(f'Got {len(lidar_points)} point arrays for {len(camera_poses)} frames of camera poses.')
+
+    trans_lidar_to_camera = _rigid_inverse(camera_poses)
+    K = np.stack([_intrinsics_to_mat(ci) for ci in camera_intrinsics])
+    image_sizes = np.asarray(image_sizes, dtype=np.float64)
+
+    results = []
+    for points3d_lidar, transforms in zip(lidar_points, trans_lidar_to_camera):
+        points3d_lidar = np.asarray(points3d_lidar, dtype=np.float64)
+        # (C, N, 3) points in every camera coordinate system
+        points3d_camera = np.einsum('cij,nj->cni', transforms[:, :3, :3], points3d_lidar) + \
+            transforms[:, np.newaxis, :3, 3]
+        depth = points3d_camera[..., 2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            points2d_camera = np.einsum('cij,cnj->cni', K[:, :2], points3d_camera) / depth[..., np.newaxis]
+        if filter_outliers:
+            image_w = image_sizes[:, [0]]
+            image_h = image_sizes[:, [1]]
+            condition = (depth > 0.0) & \
+                (points2d_camera[..., 1] < image_h) & (points2d_camera[..., 1] > 0) & \
+                (points2d_camera[..., 0] < image_w) & (points2d_camera[..., 0] > 0)
+        frame_results = []
+        for c in range(len(transforms)):
+            if filter_outliers:
+                inliner_indices_arr = np.flatnonzero(condition[c])
+            else:
+                inliner_indices_arr = np.arange(len(points3d_lidar))
+            frame_results.append((points2d_camera[c, inliner_indices_arr],
+                                  points3d_camera[c, inliner_indices_arr],
+                                  inliner_indices_arr))
+        results.append(frame_results)
+    return results[0] if single_frame else results
+
+
+def _rasterize_depth(points2d, depth, image_size, out):
+    # scale pixel coordinates to the output size, which may be downscaled
+    height, width = out.shape
+    columns = np.minimum((points2d[:, 0] * (width / image_size[0])).astype(np.int64), width - 1)
+    rows = np.minimum((points2d[:, 1] * (height / image_size[1])).astype(np.int64), height - 1)
+    cells = rows * width + columns
+    # z-buffer: sort by cell, then depth, and keep the nearest point of every cell
+    order = np.lexsort((depth, cells))
+    first = np.r_[True, cells[order][1:] != cells[order][:-1]] if len(order) else np.empty(0, dtype=bool)
+    keep = order[first]
+    out.reshape(-1)[cells[keep]] = depth[keep]
+
+
+def depth_maps(lidar_points, camera_poses, camera_intrinsics, image_sizes, scale=1.0):
+    """Rasterizes points into sparse depth images of several cameras and frames at once.
+
+    Points are projected with ``projection_batch``. Each pixel holds the depth (camera `z`-coordinate) of the nearest point projected into it,
+    which is resolved for all pixels by a single sort instead of drawing points one by one.
+
+    Args:
+        lidar_points: Points in world coordinates as array of shape `(N, 3)`, or a list of `F` such arrays, one per frame.
+        camera_poses: Camera pose matrices in world coordinates of shape `(C, 4, 4)` for a single frame, or `(F, C, 4, 4)` for `F` frames.
+        camera_intrinsics: List of `C` ``Intrinsics``, one per camera.
+        image_sizes: List of `C` image sizes as `(width, height)`, one per camera. All cameras must have the same image size.
+        scale: Factor to downscale depth images by. Output sizes are rounded the same way as ``Camera.set_decoding``, so depth images align with images decoded at the same scale.
+
+    Returns:
+        `float32` array of shape `(C, H, W)` for a single frame, or `(F, C, H, W)` for `F` frames, with `0` for pixels without points.
+
+    Examples:
+        >>> cameras = [s.camera[name] for name in s.camera.keys()]
+        >>> poses = np.stack([cam.pose_matrices for cam in cameras], axis=1)
+        >>> depths = depth_maps([pc[['x', 'y', 'z']].values for pc in s.lidar[:]], poses,
+        >>>                     [cam.intrinsics for cam in cameras], [cam[0].size for cam in cameras], scale=0.5)
+    """
+    if len(set(tuple(size) for size in image_sizes)) > 1:
+        raise ValueError(f'Depth images of different image sizes {sorted(set(tuple(size) for size in image_sizes))} cannot be stacked.')
+    if not scale > 0.0:
+        raise ValueError(f'Invalid scale `{scale}`. Scale must be greater than 0.')
+    results = projection_batch(lidar_points, camera_poses, camera_intrinsics, image_sizes)
+    single_frame = np.ndim(camera_poses) == 3
+    if single_frame:
+        results = [results]
+    image_w, image_h = image_sizes[0]
+    out_w, out_h = max(1, round(image_w * scale)), max(1, round(image_h * scale))
+    depths = np.zeros((len(results), len(image_sizes), out_h, out_w), dtype=np.float32)
+    for frame_results, frame_depths in zip(results, depths):
+        for (points2d, points3d, _), out in zip(frame_results, frame_depths):
+            _rasterize_depth(points2d, points3d[:, 2].astype(np.float32), (image_w, image_h), out)
+    return depths[0] if single_frame else depths
+
+
+def depth_map(lidar_points, camera_pose, camera_intrinsics, image_size, scale=1.0):
+    """Rasterizes points into a sparse depth image of a single camera frame.
+
+    Single camera version of ``depth_maps``.
+
+    Args:
+        lidar_points: Points in world coordinates as array of shape `(N, 3)`.
+        camera_pose: Camera pose as dictionary or transformation matrix, e.g., ``Camera.poses`` of the same frame.
+        camera_intrinsics: ``Intrinsics`` of the camera.
+        image_size: Image size as `(width, height)`.
+        scale: Factor to downscale the depth image by.
+
+    Returns:
+        `float32` array of shape `(H, W)` with the depth of the nearest point per pixel, `0` for pixels without points.
+
+    Examples:
+        >>> depth = depth_map(s.lidar[0][['x', 'y', 'z']].values, s.camera['front_camera'].poses[0],
+        >>>                   s.camera['front_camera'].intrinsics, s.camera['front_camera'][0].size)
+    """
+    return depth_maps(lidar_points, _pose_to_mat(camera_pose)[np.newaxis], [camera_intrinsics], [image_size], scale)[0]
+
+
 def lidar_points_to_ego(points, lidar_pose):
-    lidar_pose_mat = _heading_position_to_mat(
-        lidar_pose['heading'], lidar_pose['position'])
-    transform_matrix = np.linalg.inv(lidar_pose_mat)
+    transform_matrix = _rigid_inverse(_pose_to_mat(lidar_pose))
     return (transform_matrix[:3, :3] @ points.T +  transform_matrix[:3, [3]]).T
 
 
@@ -78,5 +272,246 @@ def center_box_to_corners(box):
     return corners
 
 
+_BOX_COLUMNS = ['position.x', 'position.y', 'position.z', 'dimensions.x', 'dimensions.y', 'dimensions.z', 'yaw']
+
+# corner signs in the same order as ``center_box_to_corners``
+_CORNER_SIGNS = np.array([[1, 1, -1],
+                          [1, -1, -1],
+                          [-1, -1, -1],
+                          [-1, 1, -1],
+                          [1, 1, 1],
+                          [1, -1, 1],
+                          [-1, -1, 1],
+                          [-1, 1, 1]], dtype=np.float64)
+
+
+def _boxes_to_array(boxes):
+    # accepts a cuboid data frame or an (N, 7) array of (pos_x, pos_y, pos_z, dim_x, dim_y, dim_z, yaw)
+    if isinstance(boxes, pd.DataFrame):
+        return boxes[_BOX_COLUMNS].to_numpy(dtype=np.float64)
+    return np.asarray(boxes, dtype=np.float64).reshape(-1, 7)
+
+
+def center_boxes_to_corners(boxes):
+    """Computes the corners of many cuboids at once.
+
+    Vectorized version of ``center_box_to_corners`` with the same corner order.
+
+    Args:
+        boxes: Cuboids as array of shape `(N, 7)` with rows `(pos_x, pos_y, pos_z, dim_x, dim_y, dim_z, yaw)`, or a cuboid data frame of a single frame as returned by ``Cuboids``.
+
+    Returns:
+        Array of shape `(N, 8, 3)` with the corners of every cuboid.
+
+    Examples:
+        >>> corners = center_boxes_to_corners(s.cuboids[0])
+    """
+    boxes = _boxes_to_array(boxes)
+    half_dims = boxes[:, 3:6] / 2.0
+    corners = _CORNER_SIGNS[np.newaxis] * half_dims[:, np.newaxis]
+    cos_yaw = np.cos(boxes[:, [6]])
+    sin_yaw = np.sin(boxes[:, [6]])
+    rotated = np.empty_like(corners)
+    rotated[..., 0] = cos_yaw * corners[..., 0] - sin_yaw * corners[..., 1]
+    rotated[..., 1] = sin_yaw * corners[..., 0] + cos_yaw * corners[..., 1]
+    rotated[..., 2] = corners[..., 2]
+    return rotated + boxes[:, np.newaxis, :3]
+
+
+def center_boxes_to_image_corners(boxes, camera_pose, camera_intrinsics):
+    """Projects the corners of many cuboids into a camera image at once.
+
+    Args:
+        boxes: Cuboids as array of shape `(N, 7)` or a cuboid data frame, see ``center_boxes_to_corners``.
+        camera_pose: Camera pose as dictionary or `4x4` matrix in world coordinates.
+        camera_intrinsics: ``Intrinsics`` of the camera.
+
+    Returns:
+        Tuple of image coordinates of shape `(N, 8, 2)` and depth in camera coordinates of shape `(N, 8)`. Corners with depth `<= 0` are behind the camera and their image coordinates are not meaningful.
+    """
+    corners = center_boxes_to_corners(boxes)
+    trans_world_to_camera = _rigid_inverse(_pose_to_mat(camera_pose))
+    corners_camera = corners @ trans_world_to_camera[:3, :3].T + trans_world_to_camera[:3, 3]
+    depth = corners_camera[..., 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corners2d = corners_camera @ _intrinsics_to_mat(camera_intrinsics)[:2].T / depth[..., np.newaxis]
+    return corners2d, depth
+
+
+def points_in_cuboids(points, boxes, cell_size=2.0):
+    """Assigns every point to the cuboid it is located in.
+
+    Points are bucketed into a 2D grid of `cell_size` on the x-y plane. Only points in grid cells overlapping the axis-aligned bounding box of
+    a cuboid are tested against its oriented box, so the cost grows with the number of points near cuboids instead of `points x cuboids`.
+
+    Args:
+        points: Points as array of shape `(N, 3)`, or a point cloud data frame as returned by ``Lidar``.
+        boxes: Cuboids as array of shape `(B, 7)` or a cuboid data frame of the same frame, see ``center_boxes_to_corners``.
+        cell_size: Edge length of grid cells in meter.
+
+    Returns:
+        Array of shape `(N,)` with the row position of the cuboid in `boxes` for every point, or `-1` if the point is not in any cuboid.
+        If a point is located in overlapping cuboids, the cuboid with the lowest row position is returned.
+
+    Examples:
+        >>> cuboids0 = s.cuboids[0]
+        >>> box_indices = points_in_cuboids(s.lidar[0], cuboids0)
+        >>> labels = np.where(box_indices >= 0, cuboids0['label'].values[box_indices], None)
+    """
+    if isinstance(points, pd.DataFrame):
+        points = points[['x', 'y', 'z']].to_numpy(dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    boxes = _boxes_to_array(boxes)
+    box_indices = np.full(len(points), -1, dtype=np.int64)
+    if len(points) == 0 or len(boxes) == 0:
+        return box_indices
+
+    half_dims = boxes[:, 3:6] / 2.0
+    cos_yaw = np.cos(boxes[:, 6])
+    sin_yaw = np.sin(boxes[:, 6])
+    extent_x = np.abs(cos_yaw) * half_dims[:, 0] + np.abs(sin_yaw) * half_dims[:, 1]
+    extent_y = np.abs(sin_yaw) * half_dims[:, 0] + np.abs(cos_yaw) * half_dims[:, 1]
+
+    # the grid spans the bounding box of all cuboid footprints, points outside cannot be in any cuboid
+    origin = np.array([np.min(boxes[:, 0] - extent_x), np.min(boxes[:, 1] - extent_y)])
+    end = np.array([np.max(boxes[:, 0] + extent_x), np.max(boxes[:, 1] + extent_y)])
+    candidates = np.flatnonzero(np.all((points[:, :2] >= origin) & (points[:, :2] <= end), axis=1))
+    grid_w, grid_h = np.floor((end - origin) / cell_size).astype(np.int64) + 1
+
+    # grid cells of points
+    point_cells = np.minimum(np.floor((points[candidates, :2] - origin) / cell_size).astype(np.int64), [grid_w - 1, grid_h - 1])
+    point_cell_ids = point_cells[:, 0] * grid_h + point_cells[:, 1]
+
+    # grid cell ranges covered by cuboid bounding boxes
+    cell_min_x = np.floor((boxes[:, 0] - extent_x - origin[0]) / cell_size).astype(np.int64)
+    cell_max_x = np.floor((boxes[:, 0] + extent_x - origin[0]) / cell_size).astype(np.int64)
+    cell_min_y = np.floor((boxes[:, 1] - extent_y - origin[1]) / cell_size).astype(np.int64)
+    cell_max_y = np.floor((boxes[:, 1] + extent_y - origin[1]) / cell_size).astype(np.int64)
+    cell_min_x, cell_max_x = np.maximum(cell_min_x, 0), np.minimum(cell_max_x, grid_w - 1)
+    cell_min_y, cell_max_y = np.maximum(cell_min_y, 0), np.minimum(cell_max_y, grid_h - 1)
+    cells_x = np.maximum(cell_max_x - cell_min_x + 1, 0)
+    cells_y = np.maximum(cell_max_y - cell_min_y + 1, 0)
+    cells_per_box = cells_x * cells_y
+
+    # enumerate (cuboid, cell) pairs
+    pair_box = np.repeat(np.arange(len(boxes)), cells_per_box)
+    pair_offset = np.arange(len(pair_box)) - np.repeat(np.cumsum(cells_per_box) - cells_per_box, cells_per_box)
+    pair_cell_ids = (cell_min_x[pair_box] + pair_offset // cells_y[pair_box]) * grid_h + \
+        cell_min_y[pair_box] + pair_offset % cells_y[pair_box]
+
+    # only points in cells covered by any cuboid are sorted for range lookups
+    covered = np.zeros(grid_w * grid_h, dtype=bool)
+    covered[pair_cell_ids] = True
+    point_order = np.flatnonzero(covered[point_cell_ids])
+    point_order = point_order[np.argsort(point_cell_ids[point_order])]
+    sorted_cell_ids = point_cell_ids[point_order]
+    point_order = candidates[point_order]
+
+    # expand to (cuboid, point) candidate pairs
+    start = np.searchsorted(sorted_cell_ids, pair_cell_ids, side='left')
+    count = np.searchsorted(sorted_cell_ids, pair_cell_ids, side='right') - start
+    candidate_pair = np.repeat(np.arange(len(pair_box)), count)
+    candidate_offset = np.arange(len(candidate_pair)) - np.repeat(np.cumsum(count) - count, count)
+    candidate_point = point_order[np.repeat(start, count) + candidate_offset]
+    candidate_box = pair_box[candidate_pair]
+
+    # oriented box test in cuboid coordinates
+    delta = points[candidate_point] - boxes[candidate_box, :3]
+    local_x = cos_yaw[candidate_box] * delta[:, 0] + sin_yaw[candidate_box] * delta[:, 1]
+    local_y = -sin_yaw[candidate_box] * delta[:, 0] + cos_yaw[candidate_box] * delta[:, 1]
+    inside = (np.abs(local_x) <= half_dims[candidate_box, 0]) & \
+        (np.abs(local_y) <= half_dims[candidate_box, 1]) & \
+        (np.abs(delta[:, 2]) <= half_dims[candidate_box, 2])
+    candidate_point = candidate_point[inside]
+    candidate_box = candidate_box[inside]
+
+    # lowest cuboid row per point
+    order = np.lexsort((candidate_box, candidate_point))
+    unique_points, first = np.unique(candidate_point[order], return_index=True)
+    box_indices[unique_points] = candidate_box[order][first]
+    return box_indices
+
+
+@lru_cache(maxsize=None)
+def _load_pandar64_channels():
+    table = np.loadtxt(PANDAR64_CHANNELS_FILE, delimiter=',', skiprows=1)
+    table = table[np.argsort(table[:, 0])]
+    return table[:, 1], table[:, 2]
+
+
+def pandar64_channels():
+    """Returns the channel table of the mechanical 360° Pandar64 LiDAR.
+
+    Returns:
+        Tuple of horizontal angle offsets and vertical angles in degree, each an array of shape `(64,)` ordered by channel, i.e., from the top to the bottom laser.
+    """
+    horizontal_offsets, vertical_angles = _load_pandar64_channels()
+    return horizontal_offsets.copy(), vertical_angles.copy()
+
+
+def range_image(points, lidar_pose, width=1800, channels=None):
+    """Projects a LiDAR sweep into a range image with one row per laser channel.
+
+    Points are moved into the sensor coordinate system and assigned to the channel with the nearest vertical angle. The column is the azimuth bin of the laser firing:
+    the horizontal angle offset of the channel is removed before binning and added back as a whole number of columns, so points of one firing stay in one column.
+    Columns cover the azimuth `atan2(y, x)` in sensor coordinates from -180° to 180°. If several points fall into the same cell, the closest point is kept.
+
+    Args:
+        points: Point cloud data frame as returned by ``Lidar``, from which only points of the mechanical 360° LiDAR (`d == 0`) are used.
+            Alternatively, an array of shape `(N, 3)` or `(N, 4)` with intensity in the last column, containing only points of the mechanical LiDAR.
+        lidar_pose: Pose of the LiDAR as dictionary or transformation matrix, e.g., ``Lidar.poses`` of the same frame.
+        width: Number of azimuth bins. The default matches the horizontal resolution of 0.2°.
+        channels: Optional tuple of horizontal angle offsets and vertical angles in degree per channel. Defaults to ``pandar64_channels``.
+
+    Returns:
+        Tuple of images of shape `(channels, width)`:
+            - range in meter as `float32`, `-1` for empty cells
+            - intensity as `float32`, `-1` for empty cells
+            - row position of the point in `points` as `int64`, `-1` for empty cells
+
+    Examples:
+        >>> ranges, intensities, indices = range_image(s.lidar[0], s.lidar.poses[0])
+        >>> labels = np.where(indices >= 0, s.semseg.labels(0)[indices], 0)
+    """
+    if isinstance(points, pd.DataFrame):
+        indices = np.flatnonzero(points['d'].to_numpy() == 0) if 'd' in points else np.arange(len(points))
+        xyz = points[['x', 'y', 'z']].to_numpy(dtype=np.float64)[indices]
+        intensity = points['i'].to_numpy(dtype=np.float32)[indices] if 'i' in points else np.zeros(len(indices), dtype=np.float32)
+    else:
+        points = np.asarray(points)
+        indices = np.arange(len(points))
+        xyz = points[:, :3].astype(np.float64)
+        intensity = points[:, 3].astype(np.float32) if points.shape[1] > 3 else np.zeros(len(points), dtype=np.float32)
+    horizontal_offsets, vertical_angles = _load_pandar64_channels() if channels is None else map(np.asarray, channels)
+
+    xyz = lidar_points_to_ego(xyz, lidar_pose)
+    distance = np.linalg.norm(xyz, axis=1)
+    elevation = np.degrees(np.arctan2(xyz[:, 2], np.hypot(xyz[:, 0], xyz[:, 1])))
+    azimuth = np.degrees(np.arctan2(xyz[:, 1], xyz[:, 0])) + 180.0
+
+    # nearest vertical angle: search the midpoints between sorted channel angles
+    order = np.argsort(vertical_angles)
+    sorted_angles = vertical_angles[order]
+    rows = order[np.searchsorted((sorted_angles[1:] + sorted_angles[:-1]) / 2.0, elevation)]
+    resolution = 360.0 / width
+    offsets = horizontal_offsets[rows]
+    columns = (np.round((azimuth - offsets) / resolution) + np.round(offsets / resolution)).astype(np.int64) % width
+
+    height = len(vertical_angles)
+    cells = rows * width + columns
+    # closest point per cell: sort by cell, then distance, and keep the first point of every cell
+    order = np.lexsort((distance, cells))
+    first = np.r_[True, cells[order][1:] != cells[order][:-1]] if len(order) else np.empty(0, dtype=bool)
+    keep = order[first]
+
+    ranges = np.full(height * width, -1.0, dtype=np.float32)
+    intensities = np.full(height * width, -1.0, dtype=np.float32)
+    point_indices = np.full(height * width, -1, dtype=np.int64)
+    ranges[cells[keep]] = distance[keep]
+    intensities[cells[keep]] = intensity[keep]
+    point_indices[cells[keep]] = indices[keep]
+    return ranges.reshape(height, width), intensities.reshape(height, width), point_indices.reshape(height, width)
+
+
 if __name__ == '__main__':
     pass
@@ -15,6 +15,7 @@ class Meta:
 
     Args:
          directory: Absolute or relative path where annotation files are stored
+         structure: Optional file structure as returned by ``_dump_structure``, e.g., from a ``DataSet`` manifest. If given, the directory is not searched for files.
 
     Attributes:
         data: List of meta data objects. The type of list elements depends on the subclass specific meta data type.
@@ -34,11 +35,14 @@ class Meta:
         """
         return self._data
 
-    def __init__(self, directory: str) -> None:
+    def __init__(self, directory: str, structure: Dict = None) -> None:
         self._directory: str = directory
         self._data_structure: str = None
         self._data: List[T] = None
-        self._load_data_structure()
+        if structure is None:
+            self._load_data_structure()
+        else:
+            self._restore_structure(structure)
 
     @overload
     def __getitem__(self, item: int) -> T:
@@ -63,6 +67,13 @@ class Meta:
         if os.path.isfile(meta_file):
             self._data_structure = meta_file
 
+    def _dump_structure(self) -> Dict:
+        return {'file': self._data_structure is not None}
+
+    def _restore_structure(self, structure: Dict) -> None:
+        if structure['file']:
+            self._data_structure = f'{self._directory}/{self._filename}'
+
     def _load_data(self) -> None:
         self._data = []
         with open(self._data_structure, 'r') as f:
@@ -115,8 +126,8 @@ class GPS(Meta):
         """
         return self._data
 
-    def __init__(self, directory: str) -> None:
-        Meta.__init__(self, directory)
+    def __init__(self, directory: str, structure: Dict = None) -> None:
+        Meta.__init__(self, directory, structure)
 
     @overload
     def __getitem__(self, item: int) -> Dict[str, T]:
@@ -146,8 +157,8 @@ class Timestamps(Meta):
         """
         return self._data
 
-    def __init__(self, directory: str) -> None:
-        Meta.__init__(self, directory)
+    def __init__(self, directory: str, structure: Dict = None) -> None:
+        Meta.__init__(self, directory, structure)
 
     @overload
     def __getitem__(self, item: int) -> float:
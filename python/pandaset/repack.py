@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+import argparse
+import glob
+import os
+import shutil
+from typing import List
+
+from .columnar import COLUMNAR_DIRECTORY, convert_annotations, convert_camera, convert_lidar
+from .dataset import DataSet
+from .sequence import Sequence
+from .utils import map_ordered
+
+
+def repack_sequence(directory: str, output_directory: str = None, workers: int = None) -> str:
+    """Repacks a sequence into a few large files per sensor and annotation type.
+
+    LiDAR point clouds are converted with ``convert_lidar``, camera images with ``convert_camera`` and annotations with ``convert_annotations``.
+    Each of them is written to a `columnar/` directory inside its original directory, from where ``Lidar``, ``Camera``, ``Cuboids`` and ``SemanticSegmentation`` read it
+    automatically. Reading a repacked sequence needs a handful of large sequential reads instead of one file open per frame and sensor,
+    which is considerably faster on network filesystems and object-store mounts.
+
+    If `output_directory` is given, only the repacked files and the small JSON files are written there, e.g., to copy a sequence onto a local disk for training.
+    The original `.pkl.gz` and `.jpg` files are not needed to read a repacked sequence.
+
+    Args:
+        directory: Path of a sequence directory.
+        output_directory: Path of the sequence directory to write to. Defaults to `directory`.
+        workers: Number of parallel threads, one per sensor or annotation directory.
+
+    Returns:
+        Path of the repacked sequence directory.
+
+    Examples:
+        >>> repack_sequence('/mnt/pandaset/002', '/local/pandaset/002', workers=4)
+        '/local/pandaset/002'
+        >>> s = Sequence('/local/pandaset/002').load()
+    """
+    if output_directory is None:
+        output_directory = directory
+    copy = os.path.abspath(output_directory) != os.path.abspath(directory)
+    sequence = Sequence(directory)
+
+    jobs = []
+    if sequence.lidar is not None:
+        jobs.append((convert_lidar, sequence.lidar._directory))
+    if sequence.camera is not None:
+        jobs += [(convert_camera, camera._directory) for camera in sequence.camera.values()]
+    if sequence.cuboids is not None:
+        jobs.append((convert_annotations, sequence.cuboids._directory))
+    if sequence.semseg is not None:
+        jobs.append((convert_annotations, sequence.semseg._directory))
+    if copy and sequence.gps is not None:
+        jobs.append((None, sequence.gps._directory))
+
+    def repack_directory(job) -> None:
+        convert, source = job
+        target = os.path.join(output_directory, os.path.relpath(source, directory))
+        if copy:
+            _copy_json(source, target)
+        if convert is not None:
+            convert(source, f'{target}/{COLUMNAR_DIRECTORY}')
+
+    map_ordered(repack_directory, jobs, workers)
+    return output_directory
+
+
+def repack(directory: str, output_directory: str = None, sequences: List[str] = None, workers: int = None) -> str:
+    """Repacks sequences of a dataset with ``repack_sequence``.
+
+    Args:
+        directory: Root directory of the dataset.
+        output_directory: Root directory to write the repacked dataset to. Defaults to `directory`.
+        sequences: Names of sequences to repack. Defaults to all sequences.
+        workers: Number of parallel threads per sequence.
+
+    Returns:
+        Root directory of the repacked dataset.
+    """
+    if output_directory is None:
+        output_directory = directory
+    if sequences is None:
+        sequences = DataSet(directory).sequences()
+    for sequence in sorted(sequences):
+        repack_sequence(f'{directory}/{sequence}', f'{output_directory}/{sequence}', workers)
+    return output_directory
+
+
+def _copy_json(directory: str, output_directory: str) -> None:
+    os.makedirs(output_directory, exist_ok=True)
+    for fp in glob.glob(f'{directory}/*.json'):
+        shutil.copy2(fp, output_directory)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Repack PandaSet sequences into a few large files per sensor for fast reading.')
+    parser.add_argument('directory', help='Root directory of the dataset.')
+    parser.add_argument('--output', help='Root directory to write the repacked dataset to. Defaults to the input directory.')
+    parser.add_argument('--sequences', nargs='+', help='Names of sequences to repack. Defaults to all sequences.')
+    parser.add_argument('--workers', type=int, help='Number of parallel threads per sequence.')
+    args = parser.parse_args()
+    print(repack(args.directory, args.output, args.sequences, args.workers))
@@ -2,18 +2,29 @@
 import glob
 import json
 import os.path
-from typing import List, overload, TypeVar, Dict
+from typing import List, overload, TypeVar, Dict, Tuple, Type, Union
 from abc import ABCMeta, abstractmethod
 
+import numpy as np
 import pandas as pd
 from PIL import Image
 from PIL.JpegImagePlugin import JpegImageFile
 from pandas.core.frame import DataFrame
 
+from .cache import FrameCache
+from .columnar import COLUMNAR_DIRECTORY, ImageColumns, LidarColumns, _Columns, _ColumnarSource
+from .geometry import poses_to_mat, _rigid_inverse
+from .utils import map_ordered
+
 T = TypeVar('T')
 
 
-class Sensor:
+def _points_dtype(columns: str) -> np.dtype:
+    # point timestamps are epoch seconds, which are only resolved in `float64`
+    return np.dtype(np.float64) if 't' in columns else np.dtype(np.float32)
+
+
+class Sensor(_ColumnarSource):
     """Meta class inherited by subclasses for more specific sensor types.
 
    ``Sensor`` provides generic preparation and loading methods for PandaSet folder structures. Subclasses
@@ -21,10 +32,14 @@ class Sensor:
 
    Args:
         directory: Absolute or relative path where sensor files are stored
+        cache: Optional ``FrameCache`` which holds lazily loaded frames instead of the sensor object itself
+        structure: Optional file structure as returned by ``_dump_structure``, e.g., from a ``DataSet`` manifest. If given, the directory is not searched for files.
 
    Attributes:
        data: List of sensor data objects. The type of list elements depends on the subclass implementation of protected method ``_load_data_file``
        poses: List of sensor poses in world-coordinates
+       pose_matrices: Sensor poses as stacked transformation matrices
+       inverse_pose_matrices: Inverse sensor poses as stacked transformation matrices
        timestamps: List of recording timestamps for sensor
    """
     __metaclass__ = ABCMeta
@@ -40,6 +55,8 @@ class Sensor:
 
         Subclasses can use any type inside array.
         """
+        if self._lazy:
+            return self[:]
         return self._data
 
     @property
@@ -50,6 +67,28 @@ class Sensor:
         """
         return self._poses
 
+    @property
+    def pose_matrices(self) -> np.ndarray:
+        """Returns sensor poses as transformation matrices.
+
+        Matrices are computed once when poses are loaded.
+
+        Returns:
+            Array of shape `(F, 4, 4)` with the sensor-to-world transformation matrix for each frame.
+        """
+        return self._pose_matrices
+
+    @property
+    def inverse_pose_matrices(self) -> np.ndarray:
+        """Returns inverse sensor poses as transformation matrices.
+
+        Matrices are computed once when poses are loaded.
+
+        Returns:
+            Array of shape `(F, 4, 4)` with the world-to-sensor transformation matrix for each frame.
+        """
+        return self._inverse_pose_matrices
+
     @property
     def timestamps(self) -> List[T]:
         """Returns sensor timestamp array.
@@ -58,15 +97,27 @@ class Sensor:
         """
         return self._timestamps
 
-    def __init__(self, directory: str) -> None:
+    def __init__(self, directory: str, cache: FrameCache = None, structure: Dict = None) -> None:
         self._directory: str = directory
         self._data_structure: List[str] = None
         self._data: List[T] = None
         self._poses_structure: str = None
         self._poses: List[Dict[str, T]] = None
+        self._pose_matrices: np.ndarray = None
+        self._inverse_pose_matrices: np.ndarray = None
         self._timestamps_structure: str = None
         self._timestamps: List[float] = None
-        self._load_structure()
+        self._lazy: bool = False
+        self._cache: FrameCache = cache
+        self._columns_structure: str = None
+        self._columns: _Columns = None
+        if structure is None:
+            self._load_structure()
+        else:
+            self._restore_structure(structure)
+
+    def __len__(self) -> int:
+        return len(self._data_structure)
 
     @overload
     def __getitem__(self, item: int) -> T:
@@ -77,12 +128,34 @@ class Sensor:
         ...
 
     def __getitem__(self, item):
-        return self.data[item]
+        if isinstance(item, slice):
+            return [self._frame(i) for i in range(len(self._data))[item]]
+        return self._frame(item)
+
+    def _frame(self, index: int, keep: bool = True) -> T:
+        data = self._data[index]
+        if data is None:
+            fp = self._data_structure[index]
+            if self._cache is None:
+                data = self._load_data_file(fp)
+                if keep:
+                    self._data[index] = data
+            else:
+                key = self._cache_key(fp)
+                data = self._cache.get(key)
+                if data is None:
+                    data = self._load_data_file(fp)
+                    self._cache.put(key, data)
+        return data
+
+    def _cache_key(self, fp: str) -> str:
+        return fp
 
     def _load_structure(self) -> None:
         self._load_data_structure()
         self._load_poses_structure()
         self._load_timestamps_structure()
+        self._load_columns_structure()
 
     def _load_data_structure(self) -> None:
         self._data_structure = sorted(
@@ -98,19 +171,45 @@ class Sensor:
         if os.path.isfile(timestamps_file):
             self._timestamps_structure = timestamps_file
 
-    def load(self) -> None:
+    def _dump_structure(self) -> Dict:
+        return {'files': [os.path.basename(fp) for fp in self._data_structure],
+                'sizes': [os.path.getsize(fp) if os.path.isfile(fp) else None for fp in self._data_structure],
+                'poses': self._poses_structure is not None,
+                'timestamps': self._timestamps_structure is not None,
+                'columnar': self._columns_structure is not None}
+
+    def _restore_structure(self, structure: Dict) -> None:
+        self._data_structure = [f'{self._directory}/{f}' for f in structure['files']]
+        if structure['poses']:
+            self._poses_structure = f'{self._directory}/poses.json'
+        if structure['timestamps']:
+            self._timestamps_structure = f'{self._directory}/timestamps.json'
+        if structure['columnar']:
+            self._columns_structure = f'{self._directory}/{COLUMNAR_DIRECTORY}'
+
+    def load(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> None:
         """Loads all sensor files from disk into memory.
 
         All sensor and associated meta data files are loaded into memory in filename order.
+
+        Args:
+            lazy: If `True`, only poses and timestamps are loaded. Sensor files are read from disk on first access of their frame index.
+            workers: Number of parallel workers to read sensor files with. Default reads files sequentially.
+            executor: `'thread'` or `'process'` pool for `workers`.
         """
-        self._load_data()
+        self._load_columns()
+        self._lazy = lazy
+        if lazy:
+            self._data = [None] * len(self._data_structure)
+        else:
+            self._load_data(workers, executor)
         self._load_poses()
         self._load_timestamps()
 
-    def _load_data(self) -> None:
-        self._data = []
-        for fp in self._data_structure:
-            self._data.append(self._load_data_file(fp))
+    def _load_data(self, workers: int = None, executor: str = 'thread') -> None:
+        # previously loaded frames must not be pickled to process workers
+        self._data = None
+        self._data = map_ordered(self._load_data_file, self._data_structure, workers, executor)
 
     def _load_poses(self) -> None:
         self._poses = []
@@ -118,6 +217,8 @@ class Sensor:
             file_data = json.load(f)
             for entry in file_data:
                 self._poses.append(entry)
+        self._pose_matrices = poses_to_mat(self._poses)
+        self._inverse_pose_matrices = _rigid_inverse(self._pose_matrices)
 
     def _load_timestamps(self) -> None:
         self._timestamps = []
@@ -136,6 +237,10 @@ class Lidar(Sensor):
     def _data_file_extension(self) -> str:
         return 'pkl.gz'
 
+    @property
+    def _columns_reader(self) -> Type[LidarColumns]:
+        return LidarColumns
+
     @property
     def data(self) -> List[pd.DataFrame]:
         """Returns (filtered) LiDAR point cloud array.
@@ -158,9 +263,11 @@ class Lidar(Sensor):
                     - Recorded timestamp for specific point
                 - `d`: `int`
                     - Sensor ID. `0` -> mechnical 360° LiDAR, `1` -> forward-facing LiDAR
+
+            If the sequence has been converted with ``convert_lidar``, frames are read-only views on memory-mapped arrays. In this case `x`, `y`, `z`, `i` are `float32` and `d` is `uint8`.
         """
-        if self._sensor_id in [0, 1]:
-            return [df.loc[df['d'] == self._sensor_id] for df in self._data]
+        if self._sensor_id in [0, 1] or self._lazy:
+            return self[:]
         else:
             return self._data
 
@@ -198,9 +305,10 @@ class Lidar(Sensor):
         """
         return self._timestamps
 
-    def __init__(self, directory: str) -> None:
+    def __init__(self, directory: str, cache: FrameCache = None, structure: Dict = None) -> None:
         self._sensor_id = -1
-        Sensor.__init__(self, directory)
+        self._sensor_splits: List[Union[int, np.ndarray]] = None
+        Sensor.__init__(self, directory, cache, structure)
 
     @overload
     def __getitem__(self, item: int) -> DataFrame:
@@ -222,7 +330,79 @@ class Lidar(Sensor):
         """
         self._sensor_id = sensor_id
 
+    def points(self, index: int, sensor_id: int = None, columns: str = 'xyzi') -> np.ndarray:
+        """Returns the points of a single frame as `float32` array, or as `float64` array if `columns` contains `t`.
+
+        Point timestamps are epoch seconds, which `float32` cannot resolve.
+        The per-sensor split of a frame is computed once, so selecting a single sensor is a slice instead of a filtered copy.
+        If the sequence has been converted with ``convert_lidar`` and `columns` is a prefix of `'xyzi'`, the returned array is a read-only view on the memory-mapped points.
+
+        Args:
+            index: Frame index
+            sensor_id: Set `-1` for both LiDAR sensors, set `0` for mechanical 360° LiDAR, set `1` for front-facing LiDAR. Defaults to the sensor chosen with ``set_sensor``.
+            columns: Point cloud columns to return, in order, as a string of column names, e.g., `'xyz'` or `'xyzit'`.
+
+        Returns:
+            Array of shape `(N, len(columns))`
+
+        Examples:
+            >>> xyz = s.lidar.points(40, sensor_id=0, columns='xyz')
+        """
+        return self._points(index, sensor_id, columns)
+
+    def _points(self, index: int, sensor_id: int = None, columns: str = 'xyzi', keep: bool = True, dtype: np.dtype = None) -> np.ndarray:
+        # `dtype` overrides the dtype of ``points``, e.g., to read world-coordinates as `float64` before transforming them
+        if not columns or not set(columns) <= set('xyzitd'):
+            raise ValueError(f'Invalid columns `{columns}`. Use any of `x`, `y`, `z`, `i`, `t`, `d`.')
+        index = range(len(self._data_structure))[index]
+        sensor_id = self._sensor_id if sensor_id is None else sensor_id
+        if self._columns is not None and 'xyzi'.startswith(columns):
+            start, end = self._columns.offsets[index], self._columns.offsets[index + 1]
+            rows = self._sensor_rows(index, self._columns.d[start:end], sensor_id)
+            points = self._columns.xyzi[start:end][rows, :len(columns)]
+            return points if dtype is None else points.astype(dtype)
+        df = super()._frame(index, keep)
+        rows = self._sensor_rows(index, df['d'].to_numpy(), sensor_id)
+        return df.iloc[rows][list(columns)].to_numpy(dtype=_points_dtype(columns) if dtype is None else dtype)
+
+    def _frame(self, index: int, keep: bool = True) -> DataFrame:
+        df = super()._frame(index, keep)
+        if self._sensor_id in [0, 1]:
+            return df.iloc[self._sensor_rows(index, df['d'].to_numpy(), self._sensor_id)]
+        return df
+
+    def _point_rows(self, index: int, sensor_id: int):
+        if sensor_id not in [0, 1]:
+            return slice(None)
+        d = None
+        if self._sensor_splits[index] is None:
+            # the split is kept after the first call, so the frame is read at most once and not kept in memory
+            if self._columns is not None:
+                d = self._columns.d[self._columns.offsets[index]:self._columns.offsets[index + 1]]
+            else:
+                d = super()._frame(index, keep=False)['d'].to_numpy()
+        return self._sensor_rows(index, d, sensor_id)
+
+    def _sensor_rows(self, index: int, d: np.ndarray, sensor_id: int):
+        if sensor_id not in [0, 1]:
+            return slice(None)
+        split = self._sensor_splits[index]
+        if split is None:
+            # points are usually ordered by sensor, which allows slicing instead of masking
+            split = int(np.searchsorted(d, 1)) if np.all(d[:-1] <= d[1:]) else np.asarray(d, dtype=np.uint8)
+            self._sensor_splits[index] = split
+        if isinstance(split, np.ndarray):
+            # frames not ordered by sensor keep their sensor IDs as compact array
+            return split == sensor_id
+        return slice(0, split) if sensor_id == 0 else slice(split, None)
+
+    def load(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> None:
+        self._sensor_splits = [None] * len(self._data_structure)
+        super().load(lazy, workers, executor)
+
     def _load_data_file(self, fp: str) -> DataFrame:
+        if self._columns is not None:
+            return self._columns.frame(self._data_structure.index(fp))
         return pd.read_pickle(fp)
 
 
@@ -232,13 +412,18 @@ class Camera(Sensor):
         return 'jpg'
 
     @property
-    def data(self) -> List[JpegImageFile]:
+    def _columns_reader(self) -> Type[ImageColumns]:
+        return ImageColumns
+
+    @property
+    def data(self) -> List[Union[JpegImageFile, Image.Image, np.ndarray]]:
         """Returns Camera image array.
 
         Returns:
             List of camera images for each timestamp. Camera images are loaded as [``JpegImageFile``](https://pillow.readthedocs.io/en/stable/reference/plugins.html#PIL.JpegImagePlugin.JpegImageFile).
+            If a reduced scale or crop box is set with ``set_decoding``, images are ``Image`` objects. If `output='array'` is set, images are read-only `uint8` arrays of shape `(H, W, 3)`.
         """
-        return self._data
+        return super().data
 
     @property
     def poses(self) -> List[Dict[str, Dict[str, float]]]:
@@ -283,10 +468,11 @@ class Camera(Sensor):
         """
         return self._intrinsics
 
-    def __init__(self, directory: str) -> None:
+    def __init__(self, directory: str, cache: FrameCache = None, structure: Dict = None) -> None:
         self._intrinsics_structure: str = None
         self._intrinsics: Intrinsics = None
-        Sensor.__init__(self, directory)
+        self._decoding: Tuple[float, Tuple[int, int, int, int], str] = (1.0, None, 'image')
+        Sensor.__init__(self, directory, cache, structure)
 
     @overload
     def __getitem__(self, item: int) -> JpegImageFile:
@@ -299,8 +485,48 @@ class Camera(Sensor):
     def __getitem__(self, item):
         return super().__getitem__(item)
 
-    def load(self) -> None:
-        super().load()
+    def set_decoding(self, scale: float = 1.0, crop: Tuple[int, int, int, int] = None, output: str = 'image') -> None:
+        """Specifies resolution, region and type of the returned camera images.
+
+        Reduced scales are decoded with Pillow's [``draft``](https://pillow.readthedocs.io/en/stable/reference/Image.html#PIL.Image.Image.draft) mode, which lets the JPEG decoder skip
+        high frequencies and directly outputs 1/2, 1/4 or 1/8 of the full resolution. Other scales are decoded at the next larger of these and resized to the exact size.
+        At reduced scales, the decoder skips part of the inverse DCT and color conversion work, and images need a quarter of the memory at `scale=0.5`. The speed-up depends on the image content.
+        Images which are already loaded are decoded again with the new settings, so preferably call this before ``load``.
+
+        Pixel coordinates of the decoded images relate to full resolution coordinates `(u, v)` as `((u - crop[0]) * scale, (v - crop[1]) * scale)`, e.g., for points returned by ``geometry.projection``.
+
+        Args:
+            scale: Scale factor in `(0, 1]` relative to the full image resolution.
+            crop: Optional crop box `(left, upper, right, lower)` in full resolution pixel coordinates.
+            output: Set `'image'` for decoded ``Image`` objects, `'array'` for read-only `uint8` arrays of shape `(H, W, 3)`, or `'lazy'` for opened but not yet decoded ``JpegImageFile`` objects.
+                Lazy images keep their file open until they are loaded and approximate `scale` with the next larger draft resolution. They cannot be cropped.
+
+        Examples:
+            >>> front_camera = s.camera['front_camera']
+            >>> front_camera.set_decoding(scale=0.5, output='array')
+            >>> front_camera.load()
+            >>> print(front_camera[0].shape)
+            (540, 960, 3)
+        """
+        if not 0 < scale <= 1:
+            raise ValueError(f'Invalid scale `{scale}`. Use a value in `(0, 1]`.')
+        if output not in ['image', 'array', 'lazy']:
+            raise ValueError(f'Invalid output `{output}`. Use `image`, `array` or `lazy`.')
+        if crop is not None:
+            if output == 'lazy':
+                raise ValueError('Lazy images cannot be cropped.')
+            crop = tuple(int(c) for c in crop)
+            if len(crop) != 4 or crop[0] >= crop[2] or crop[1] >= crop[3]:
+                raise ValueError(f'Invalid crop box `{crop}`. Use `(left, upper, right, lower)`.')
+        self._decoding = (float(scale), crop, output)
+        if self._data is not None:
+            if self._lazy:
+                self._data = [None] * len(self._data_structure)
+            else:
+                self._load_data()
+
+    def load(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> None:
+        super().load(lazy, workers, executor)
         self._load_intrinsics()
 
     def _load_structure(self) -> None:
@@ -312,13 +538,83 @@ class Camera(Sensor):
         if os.path.isfile(intrinsics_file):
             self._intrinsics_structure = intrinsics_file
 
-    def _load_data_file(self, fp: str) -> JpegImageFile:
-        # solve this bug: https://github.com/python-pillow/Pillow/issues/1237
-        img = Image.open(fp)
-        image = img.copy()
+    def _dump_structure(self) -> Dict:
+        structure = super()._dump_structure()
+        structure['intrinsics'] = self._intrinsics_structure is not None
+        return structure
+
+    def _restore_structure(self, structure: Dict) -> None:
+        super()._restore_structure(structure)
+        if structure['intrinsics']:
+            self._intrinsics_structure = f'{self._directory}/intrinsics.json'
+
+    def _cache_key(self, fp: str) -> str:
+        scale, crop, output = self._decoding
+        if scale == 1.0 and crop is None and output == 'image':
+            return fp
+        return f'{fp}?scale={scale}&crop={crop}&output={output}'
+
+    def _open(self, fp: str) -> JpegImageFile:
+        if self._columns is not None:
+            return Image.open(self._columns.frame(self._data_structure.index(fp)))
+        return Image.open(fp)
+
+    def _load_data_file(self, fp: str) -> Union[JpegImageFile, Image.Image, np.ndarray]:
+        scale, crop, output = self._decoding
+        img = self._open(fp)
+        if output == 'lazy':
+            if scale < 1.0:
+                img.draft('RGB', (max(1, round(img.size[0] * scale)), max(1, round(img.size[1] * scale))))
+            return img
+        if scale == 1.0 and crop is None:
+            # arrays are converted from the decoded file directly, images are copied to solve this bug: https://github.com/python-pillow/Pillow/issues/1237
+            image = img if output == 'array' else img.copy()
+        else:
+            image = self._decode(img, scale, crop)
+        if output == 'array':
+            image = np.asarray(image.convert('RGB') if image.mode != 'RGB' else image)
         img.close()
         return image
-    
+
+    def _decoded_size(self, index: int) -> Tuple[int, int]:
+        scale, crop, _ = self._decoding
+        if crop is None:
+            # only the JPEG header is read
+            with self._open(self._data_structure[index]) as img:
+                crop = (0, 0) + img.size
+        return max(1, round((crop[2] - crop[0]) * scale)), max(1, round((crop[3] - crop[1]) * scale))
+
+    def _decode_into(self, index: int, out: np.ndarray) -> None:
+        scale, crop, _ = self._decoding
+        data = self._data[index] if self._data is not None else None
+        if data is not None:
+            self._copy_into(index, data, out)
+            return
+        with self._open(self._data_structure[index]) as img:
+            self._copy_into(index, img if scale == 1.0 and crop is None else self._decode(img, scale, crop), out)
+
+    def _copy_into(self, index: int, image: Union[Image.Image, np.ndarray], out: np.ndarray) -> None:
+        if isinstance(image, Image.Image) and image.mode != 'RGB':
+            image = image.convert('RGB')
+        array = np.asarray(image)
+        if array.shape != out.shape:
+            raise ValueError(f'Image `{self._data_structure[index]}` of shape {array.shape} does not fit into buffer of shape {out.shape}.')
+        out[...] = array
+
+    @staticmethod
+    def _decode(img: JpegImageFile, scale: float, crop: Tuple[int, int, int, int]) -> Image.Image:
+        width, height = img.size
+        box = crop if crop is not None else (0, 0, width, height)
+        size = (max(1, round((box[2] - box[0]) * scale)), max(1, round((box[3] - box[1]) * scale)))
+        if scale < 1.0:
+            # decoder picks the smallest DCT reduction which is still at least as large as the requested size
+            img.draft('RGB', (max(1, round(width * scale)), max(1, round(height * scale))))
+        fx, fy = width / img.size[0], height / img.size[1]
+        box = (box[0] / fx, box[1] / fy, box[2] / fx, box[3] / fy)
+        if size == (box[2] - box[0], box[3] - box[1]) and all(float(c).is_integer() for c in box):
+            return img.crop(tuple(int(c) for c in box))
+        return img.resize(size, Image.BILINEAR, box=box)
+
     def _load_intrinsics(self) -> None:
         with open(self._intrinsics_structure, 'r') as f:
             file_data = json.load(f)
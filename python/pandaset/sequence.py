@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
-from typing import Dict
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
 
 from .annotations import Cuboids
 from .annotations import SemanticSegmentation
+from .cache import FrameCache
+from .ego import EgoFrames
 from .meta import GPS
 from .meta import Timestamps
 from .sensors import Camera
@@ -17,6 +24,8 @@ class Sequence:
 
     Args:
          directory: Absolute or relative path where annotation files are stored
+         cache: Optional ``FrameCache`` shared by all sensors and annotations of the sequence for lazily loaded frames
+         structure: Optional file structure as returned by ``_dump_structure``, e.g., from a ``DataSet`` manifest. If given, the directory is not searched for files.
     """
 
     @property
@@ -80,76 +89,153 @@ class Sequence:
         """
         return self._semseg
 
-    def __init__(self, directory: str) -> None:
+    @property
+    def ego(self) -> EgoFrames:
+        """ Stores ``EgoFrames`` object for sequence, which converts LiDAR points and cuboids into ego-coordinates once per frame.
+
+        Conversions are kept in memory, unless a directory has been set with ``set_ego_cache``.
+
+        Returns:
+            Instance of ``EgoFrames`` class.
+
+        Examples:
+            >>> points = s.ego.points(0)
+            >>> boxes = s.ego.boxes(0)
+        """
+        if self._ego is None:
+            self._ego = EgoFrames(self)
+        return self._ego
+
+    def __init__(self, directory: str, cache: FrameCache = None, structure: Dict = None) -> None:
         self._directory: str = directory
+        self._cache: FrameCache = cache
+        self._directories: List[str] = None
         self._lidar: Lidar = None
         self._camera: Dict[str, Camera] = None
         self._gps: GPS = None
         self._timestamps: Timestamps = None
         self._cuboids: Cuboids = None
         self._semseg: SemanticSegmentation = None
-        self._load_data_structure()
+        self._ego: EgoFrames = None
+        if structure is None:
+            self._load_data_structure()
+        else:
+            self._restore_data_structure(structure)
 
     def _load_data_structure(self) -> None:
         data_directories = subdirectories(self._directory)
+        self._directories = [self._directory] + data_directories
 
         for dd in data_directories:
             if dd.endswith('lidar'):
-                self._lidar = Lidar(dd)
+                self._lidar = Lidar(dd, self._cache)
             elif dd.endswith('camera'):
                 self._camera = {}
                 camera_directories = subdirectories(dd)
+                self._directories += camera_directories
                 for cd in camera_directories:
                     camera_name = cd.split('/')[-1].split('\\')[-1]
-                    self._camera[camera_name] = Camera(cd)
+                    self._camera[camera_name] = Camera(cd, self._cache)
             elif dd.endswith('meta'):
                 self._gps = GPS(dd)
                 self._timestamps = Timestamps(dd)
             elif dd.endswith('annotations'):
                 annotation_directories = subdirectories(dd)
+                self._directories += annotation_directories
                 for ad in annotation_directories:
                     if ad.endswith('cuboids'):
-                        self._cuboids = Cuboids(ad)
+                        self._cuboids = Cuboids(ad, self._cache)
                     elif ad.endswith('semseg'):
-                        self._semseg = SemanticSegmentation(ad)
-
-    def load(self) -> 'Sequence':
+                        self._semseg = SemanticSegmentation(ad, self._cache)
+
+    def _dump_structure(self) -> Dict:
+        def relative(obj) -> str:
+            return os.path.relpath(obj._directory, self._directory)
+
+        def entry(obj) -> Dict:
+            structure = obj._dump_structure()
+            structure['directory'] = relative(obj)
+            return structure
+
+        return {'frames': len(self._lidar) if self._lidar is not None else 0,
+                'directories': {os.path.relpath(d, self._directory): os.stat(d).st_mtime_ns for d in self._directories},
+                'lidar': entry(self._lidar) if self._lidar is not None else None,
+                'camera': {name: entry(cam) for name, cam in self._camera.items()} if self._camera is not None else None,
+                'meta': {'directory': relative(self._gps),
+                         'gps': self._gps._dump_structure(),
+                         'timestamps': self._timestamps._dump_structure()} if self._gps is not None else None,
+                'cuboids': entry(self._cuboids) if self._cuboids is not None else None,
+                'semseg': entry(self._semseg) if self._semseg is not None else None}
+
+    def _restore_data_structure(self, structure: Dict) -> None:
+        def path(entry: Dict) -> str:
+            return os.path.join(self._directory, entry['directory'])
+
+        self._directories = [os.path.join(self._directory, d) for d in structure['directories']]
+        if structure['lidar'] is not None:
+            self._lidar = Lidar(path(structure['lidar']), self._cache, structure['lidar'])
+        if structure['camera'] is not None:
+            self._camera = {name: Camera(path(entry), self._cache, entry) for name, entry in structure['camera'].items()}
+        if structure['meta'] is not None:
+            self._gps = GPS(path(structure['meta']), structure['meta']['gps'])
+            self._timestamps = Timestamps(path(structure['meta']), structure['meta']['timestamps'])
+        if structure['cuboids'] is not None:
+            self._cuboids = Cuboids(path(structure['cuboids']), self._cache, structure['cuboids'])
+        if structure['semseg'] is not None:
+            self._semseg = SemanticSegmentation(path(structure['semseg']), self._cache, structure['semseg'])
+
+    def load(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> 'Sequence':
         """Loads all sequence files from disk into memory.
 
         All sequence files are loaded into memory, including sensor, meta and annotation data.
 
+        Args:
+            lazy: If `True`, sensor and annotation files are only read from disk when their frame is accessed. Meta data is always loaded. If the sequence has a ``FrameCache``, lazily loaded frames are held by the cache.
+            workers: Number of parallel workers to read sensor and annotation files with. Files are still returned in filename order.
+            executor: `'thread'` or `'process'` pool for `workers`. Decompression and JPEG decoding release the GIL, so threads are usually sufficient.
+
         Returns:
             Current instance of ``Sequence``
         """
-        self.load_lidar()
-        self.load_camera()
+        self.load_lidar(lazy, workers, executor)
+        self.load_camera(lazy, workers, executor)
         self.load_gps()
         self.load_timestamps()
-        self.load_cuboids()
-        self.load_semseg()
+        self.load_cuboids(lazy, workers, executor)
+        self.load_semseg(lazy, workers, executor)
         return self
 
-    def load_lidar(self) -> 'Sequence':
+    def load_lidar(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> 'Sequence':
         """Loads all LiDAR files from disk into memory.
 
         All LiDAR point cloud files are loaded into memory.
 
+        Args:
+            lazy: If `True`, files are only read from disk when their frame is accessed.
+            workers: Number of parallel workers to read files with.
+            executor: `'thread'` or `'process'` pool for `workers`.
+
         Returns:
             Current instance of ``Sequence``
         """
-        self._lidar.load()
+        self._lidar.load(lazy, workers, executor)
         return self
 
-    def load_camera(self) -> 'Sequence':
+    def load_camera(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> 'Sequence':
         """Loads all camera files from disk into memory.
 
         All camera image files are loaded into memory.
 
+        Args:
+            lazy: If `True`, files are only read from disk when their frame is accessed.
+            workers: Number of parallel workers to read files with.
+            executor: `'thread'` or `'process'` pool for `workers`.
+
         Returns:
             Current instance of ``Sequence``
         """
         for cam in self._camera.values():
-            cam.load()
+            cam.load(lazy, workers, executor)
         return self
 
     def load_gps(self) -> 'Sequence':
@@ -174,29 +260,192 @@ class Sequence:
         self._timestamps.load()
         return self
 
-    def load_cuboids(self) -> 'Sequence':
+    def load_cuboids(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> 'Sequence':
         """Loads all cuboid annotation files from disk into memory.
 
         All cuboid annotation files are loaded into memory.
 
+        Args:
+            lazy: If `True`, files are only read from disk when their frame is accessed.
+            workers: Number of parallel workers to read files with.
+            executor: `'thread'` or `'process'` pool for `workers`.
+
         Returns:
             Current instance of ``Sequence``
         """
-        self._cuboids.load()
+        self._cuboids.load(lazy, workers, executor)
         return self
 
-    def load_semseg(self) -> 'Sequence':
+    def load_semseg(self, lazy: bool = False, workers: int = None, executor: str = 'thread') -> 'Sequence':
         """Loads all semantic segmentation files from disk into memory.
 
         All semantic segmentation files are loaded into memory.
 
+        Args:
+            lazy: If `True`, files are only read from disk when their frame is accessed.
+            workers: Number of parallel workers to read files with.
+            executor: `'thread'` or `'process'` pool for `workers`.
+
         Returns:
             Current instance of ``Sequence``
         """
         if self.semseg:
-            self.semseg.load()
+            self.semseg.load(lazy, workers, executor)
+        return self
+
+    def set_ego_cache(self, directory: str = None) -> 'Sequence':
+        """Sets where ``ego`` keeps LiDAR points and cuboids converted into ego-coordinates.
+
+        Previously converted frames are discarded.
+
+        Args:
+            directory: Directory to write converted frames to as `.npy` files, which are read back memory-mapped by later runs. Must only be used for this sequence. If `None`, conversions are kept in memory.
+
+        Returns:
+            Current instance of ``Sequence``
+
+        Examples:
+            >>> s.set_ego_cache('/local/ego_cache/002')
+            >>> corners = s.ego.corners(0)
+        """
+        self._ego = EgoFrames(self, directory)
         return self
 
+    def frame(self, index: int, sensors: List[str] = None) -> Dict:
+        """Reads a single synchronized frame of the sequence.
+
+        Frames that are already loaded into memory are not read again. Otherwise, files are read without keeping them in memory, unless the sequence has a ``FrameCache``.
+        Meta data and sensor poses are loaded if necessary.
+
+        Args:
+            index: Frame index
+            sensors: Names of data to read. Valid names are `'lidar'`, `'cuboids'`, `'semseg'` and the camera names in ``camera``. Defaults to all available data.
+
+        Returns:
+            Frame dictionary with the following keys:
+                - `index`: `int`
+                    - Frame index
+                - `timestamp`: `float`
+                - `gps`: `dict`
+                - `lidar`: ``DataFrame``, if requested
+                    - Filtered by ``Lidar.set_sensor``
+                - `lidar_pose`: `dict`
+                - `camera`: `dict`
+                    - Camera name to image, for requested cameras
+                - `camera_pose`: `dict`
+                    - Camera name to pose, for requested cameras
+                - `cuboids`: ``DataFrame``, if requested
+                - `semseg`: ``DataFrame``, if requested and available
+        """
+        return self._read_frame(index, self._prepare_frames(sensors))
+
+    def labeled_points(self, index: int, sensor_id: int = None, columns: str = 'xyz') -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the points of a single frame together with their semantic segmentation class IDs.
+
+        Points and class IDs are read as compact arrays in one call, with the same sensor filter applied to both. LiDAR and semantic segmentation are loaded lazily if they have not been loaded before.
+
+        Args:
+            index: Frame index
+            sensor_id: Set `-1` for both LiDAR sensors, set `0` for mechanical 360° LiDAR, set `1` for front-facing LiDAR. Defaults to the sensor chosen with ``Lidar.set_sensor``.
+            columns: Point cloud columns to return, see ``Lidar.points``.
+
+        Returns:
+            Tuple of `float32` points of shape `(N, len(columns))` and `uint8` class IDs of shape `(N,)`.
+
+        Examples:
+            >>> points, labels = s.labeled_points(0, sensor_id=0)
+            >>> road = points[labels == 7]
+        """
+        if self._semseg is None:
+            raise ValueError(f'Sequence `{self._directory}` has no semantic segmentation annotations.')
+        for obj in [self._lidar, self._semseg]:
+            if obj._data is None:
+                obj.load(lazy=True)
+        sensor_id = self._lidar._sensor_id if sensor_id is None else sensor_id
+        index = range(len(self._lidar))[index]
+        # reading the points caches the sensor split, so selecting the labels does not read the frame again
+        points = self._lidar._points(index, sensor_id, columns, keep=False)
+        labels = self._semseg.labels(index)[self._lidar._point_rows(index, sensor_id)]
+        return points, labels
+
+    def iter_frames(self, sensors: List[str] = None, prefetch: int = 2, frames: Iterable[int] = None) -> Iterator[Dict]:
+        """Iterates over synchronized frames of the sequence while reading ahead in background threads.
+
+        Only the frames currently read ahead and the yielded frame are held in memory, independent of the sequence length.
+
+        Args:
+            sensors: Names of data to read for each frame, see ``frame``. Defaults to all available data.
+            prefetch: Number of frames to read ahead in background threads. Set `0` to read frames in the calling thread.
+            frames: Frame indices to iterate over, in order. Defaults to all frames.
+
+        Returns:
+            Generator of frame dictionaries as returned by ``frame``.
+
+        Examples:
+            >>> for frame in s.iter_frames(sensors=['lidar', 'front_camera', 'cuboids'], prefetch=4):
+            >>>     run_inference(frame['lidar'], frame['camera']['front_camera'])
+        """
+        sensors = self._prepare_frames(sensors)
+        indices = range(len(self._lidar)) if frames is None else frames
+        if prefetch < 1:
+            for index in indices:
+                yield self._read_frame(index, sensors)
+            return
+
+        indices = iter(indices)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=prefetch) as pool:
+            try:
+                for index in indices:
+                    pending.append(pool.submit(self._read_frame, index, sensors))
+                    if len(pending) > prefetch:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _prepare_frames(self, sensors: List[str] = None) -> List[str]:
+        camera_names = list(self._camera.keys())
+        if sensors is None:
+            sensors = ['lidar', 'cuboids', 'semseg'] + camera_names
+        unknown = set(sensors) - set(['lidar', 'cuboids', 'semseg'] + camera_names)
+        if unknown:
+            raise ValueError(f'Unknown sensors {sorted(unknown)}.')
+        if self._semseg is None:
+            sensors = [name for name in sensors if name != 'semseg']
+
+        if self._gps.data is None:
+            self.load_gps()
+        if self._timestamps.data is None:
+            self.load_timestamps()
+        objects = [self._lidar] + [self._camera[name] for name in sensors if name in self._camera]
+        if 'cuboids' in sensors:
+            objects.append(self._cuboids)
+        if 'semseg' in sensors:
+            objects.append(self._semseg)
+        for obj in objects:
+            if obj._data is None:
+                obj.load(lazy=True)
+        return sensors
+
+    def _read_frame(self, index: int, sensors: List[str]) -> Dict:
+        cameras = [name for name in sensors if name in self._camera]
+        frame = {'index': index,
+                 'timestamp': self._timestamps[index],
+                 'gps': self._gps[index],
+                 'lidar_pose': self._lidar.poses[index],
+                 'camera': {c: self._camera[c]._frame(index, keep=False) for c in cameras},
+                 'camera_pose': {c: self._camera[c].poses[index] for c in cameras}}
+        if 'lidar' in sensors:
+            frame['lidar'] = self._lidar._frame(index, keep=False)
+        if 'cuboids' in sensors:
+            frame['cuboids'] = self._cuboids._frame(index, keep=False)
+        if 'semseg' in sensors:
+            frame['semseg'] = self._semseg._frame(index, keep=False)
+        return frame
+
 
 if __name__ == '__main__':
     pass
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class Track:
+    """Trajectory of a single object across the frames of a sequence.
+
+    All arrays have one entry per frame in which the object is annotated, in frame order.
+
+    Attributes:
+        uuid: Unique identifier of the object
+        label: Object class of the first annotation
+        frames: `int` array of frame indices
+        rows: `int` array of row positions of the cuboids within their frame in ``Cuboids.data``
+        positions: `float32` array of shape `(T, 3)` with cuboid centers in world-coordinates
+        dimensions: `float32` array of shape `(T, 3)` with cuboid dimensions
+        yaws: `float32` array of shape `(T,)` with cuboid yaw in radians
+        sensor_ids: `int` array of `cuboids.sensor_id` values
+    """
+
+    def __init__(self, uuid: str, label: str, frames: np.ndarray, rows: np.ndarray, positions: np.ndarray,
+                 dimensions: np.ndarray, yaws: np.ndarray, sensor_ids: np.ndarray) -> None:
+        self.uuid: str = uuid
+        self.label: str = label
+        self.frames: np.ndarray = frames
+        self.rows: np.ndarray = rows
+        self.positions: np.ndarray = positions
+        self.dimensions: np.ndarray = dimensions
+        self.yaws: np.ndarray = yaws
+        self.sensor_ids: np.ndarray = sensor_ids
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __repr__(self) -> str:
+        return f'Track(uuid={self.uuid!r}, label={self.label!r}, frames={len(self)})'
+
+
+class Tracks:
+    """Index of all object tracks of a sequence, built from the `uuid` column of ``Cuboids.table``.
+
+    Rows of all cuboids are grouped by `uuid` once, so a full trajectory is a contiguous slice of pre-sorted arrays and is returned in `O(track length)`.
+
+    In the overlap area of both LiDAR sensors, moving objects have two cuboids per frame with different `uuid`, one for each sensor, which reference each other in `cuboids.sibling_id`.
+    Each of them is indexed as its own track, and ``sibling`` returns the `uuid` of the other one. ``track`` can merge both into one trajectory as seen by a single sensor.
+
+    Args:
+        table: Cuboids of a sequence as returned by ``Cuboids.table``.
+
+    Examples:
+        >>> tracks = s.cuboids.tracks
+        >>> print(len(tracks))
+        312
+        >>> track = tracks['a4f26d5e-4f1b-4cd3-8e9a-41e6cd2a7dcf']
+        >>> velocities = np.diff(track.positions, axis=0) / np.diff(np.array(s.timestamps.data)[track.frames])[:, np.newaxis]
+    """
+
+    @property
+    def uuids(self) -> List[str]:
+        """Returns the `uuid` of all tracks."""
+        return self._uuids
+
+    def __init__(self, table: pd.DataFrame) -> None:
+        uuids = pd.Categorical(table['uuid'])
+        codes = np.asarray(uuids.codes)
+        frames = table['frame'].to_numpy()
+        # rows of the table are ordered by frame, so a stable sort keeps each track in frame order
+        order = np.argsort(codes, kind='stable')
+        order = order[codes[order] >= 0]
+        sorted_codes = codes[order]
+
+        self._uuids: List[str] = list(uuids.categories)
+        self._starts: np.ndarray = np.searchsorted(sorted_codes, np.arange(len(self._uuids) + 1))
+        self._lookup: Dict[str, int] = {uuid: i for i, uuid in enumerate(self._uuids)}
+
+        frame_starts = np.searchsorted(frames, frames)
+        self._frames: np.ndarray = frames[order]
+        self._rows: np.ndarray = (np.arange(len(frames)) - frame_starts)[order]
+        self._positions: np.ndarray = table[['position.x', 'position.y', 'position.z']].to_numpy(dtype=np.float32)[order]
+        self._dimensions: np.ndarray = table[['dimensions.x', 'dimensions.y', 'dimensions.z']].to_numpy(dtype=np.float32)[order]
+        self._yaws: np.ndarray = table['yaw'].to_numpy(dtype=np.float32)[order]
+        self._sensor_ids: np.ndarray = table['cuboids.sensor_id'].to_numpy()[order] \
+            if 'cuboids.sensor_id' in table else np.full(len(order), -1, dtype=np.int8)
+        self._labels: np.ndarray = table['label'].to_numpy()[order]
+        self._siblings: Dict[str, str] = self._load_siblings(table)
+
+    def __len__(self) -> int:
+        return len(self._uuids)
+
+    def __contains__(self, uuid: str) -> bool:
+        return uuid in self._lookup
+
+    def __iter__(self) -> Iterator[Track]:
+        for uuid in self._uuids:
+            yield self[uuid]
+
+    def __getitem__(self, uuid: str) -> Track:
+        return self._track(uuid, self._rows_of(uuid))
+
+    def sibling(self, uuid: str) -> str:
+        """Returns the `uuid` of the cuboid measuring the same object with the other LiDAR sensor.
+
+        Args:
+            uuid: `uuid` of a track
+
+        Returns:
+            `uuid` of the sibling track, or `None` if the object has no sibling.
+        """
+        return self._siblings.get(uuid)
+
+    def track(self, uuid: str, sensor_id: int = -1) -> Track:
+        """Returns the trajectory of an object as seen by a single LiDAR sensor, merged with its sibling track.
+
+        For frames in which the object has cuboids for both sensors, the cuboid of `sensor_id` is used. All other frames use the only available cuboid.
+
+        Args:
+            uuid: `uuid` of a track
+            sensor_id: Set `0` for mechanical 360° LiDAR, set `1` for front-facing LiDAR. Set `-1` to return the track of `uuid` unchanged.
+
+        Returns:
+            Merged track with the `uuid` of the requested track.
+        """
+        rows = self._rows_of(uuid)
+        sibling = self.sibling(uuid)
+        if sensor_id not in [0, 1] or sibling is None or sibling not in self._lookup:
+            return self._track(uuid, rows)
+        rows = np.concatenate([np.arange(rows.start, rows.stop), np.arange(*self._slice_of(sibling))])
+        # per frame, prefer the cuboid of the requested sensor over cuboids of no specific sensor over the other sensor
+        sensor_ids = self._sensor_ids[rows]
+        preference = np.where(sensor_ids == sensor_id, 0, np.where(sensor_ids < 0, 1, 2))
+        rows = rows[np.lexsort((preference, self._frames[rows]))]
+        rows = rows[np.r_[True, self._frames[rows][1:] != self._frames[rows][:-1]]]
+        return self._track(uuid, rows)
+
+    def _slice_of(self, uuid: str) -> Tuple[int, int]:
+        if uuid not in self._lookup:
+            raise KeyError(uuid)
+        code = self._lookup[uuid]
+        return self._starts[code], self._starts[code + 1]
+
+    def _rows_of(self, uuid: str) -> slice:
+        return slice(*self._slice_of(uuid))
+
+    def _track(self, uuid: str, rows) -> Track:
+        labels = self._labels[rows]
+        return Track(uuid=uuid,
+                     label=str(labels[0]) if len(labels) else None,
+                     frames=self._frames[rows],
+                     rows=self._rows[rows],
+                     positions=self._positions[rows],
+                     dimensions=self._dimensions[rows],
+                     yaws=self._yaws[rows],
+                     sensor_ids=self._sensor_ids[rows])
+
+    @staticmethod
+    def _load_siblings(table: pd.DataFrame) -> Dict[str, str]:
+        if 'cuboids.sibling_id' not in table or 'cuboids.sensor_id' not in table:
+            return {}
+        paired = table[table['cuboids.sensor_id'].isin([0, 1]).to_numpy()]
+        siblings = {}
+        for uuid, sibling in zip(paired['uuid'].astype(object), paired['cuboids.sibling_id'].astype(object)):
+            if isinstance(sibling, str) and sibling not in ['', '-']:
+                siblings.setdefault(uuid, sibling)
+                siblings.setdefault(sibling, uuid)
+        return siblings
+
+
+if __name__ == '__main__':
+    pass
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 import os
-from typing import List
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Callable, Iterable, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
 
 
 def subdirectories(directory: str) -> List[str]:
@@ -15,5 +19,26 @@ def subdirectories(directory: str) -> List[str]:
     return [d.path for d in os.scandir(directory) if d.is_dir()]
 
 
+def map_ordered(function: Callable[[T], R], items: Iterable[T], workers: int = None, executor: str = 'thread') -> List[R]:
+    """Applies a function to every item, optionally in a worker pool, and keeps the item order.
+
+    Args:
+        function: Callable applied to every item. Must be picklable if `executor` is `'process'`.
+        items: Items to apply `function` on.
+        workers: Number of pool workers. If `None` or smaller than `2`, items are processed sequentially in the calling thread.
+        executor: `'thread'` for a thread pool, `'process'` for a process pool.
+
+    Returns:
+        List of results in the same order as `items`.
+    """
+    if executor not in ['thread', 'process']:
+        raise ValueError(f'Unknown executor `{executor}`. Use `thread` or `process`.')
+    if workers is None or workers < 2:
+        return [function(i) for i in items]
+    pool_class = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+    with pool_class(max_workers=workers) as pool:
+        return list(pool.map(function, items))
+
+
 if __name__ == '__main__':
     pass
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+from typing import Dict, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .geometry import lidar_points_to_ego
+
+
+class Voxelizer:
+    """Groups LiDAR points into voxels or pillars, e.g., as input of voxel- and pillar-based 3D detectors.
+
+    Points are assigned to grid cells by a single stable sort of their linear cell index, without any per-point Python code.
+    Each voxel keeps its first `max_points` points in input order. If there are more than `max_voxels` occupied voxels, the voxels whose first point comes first are kept.
+
+    With `reuse_buffers=True`, output arrays are allocated once for `max_voxels` and every call returns views on them, so repeated calls in a data loader do not allocate.
+    The returned arrays are then overwritten by the next call and must be copied if they are kept.
+
+    Args:
+        voxel_size: Edge lengths of voxels `(x, y, z)` in meter.
+        point_range: Grid bounds `(x_min, y_min, z_min, x_max, y_max, z_max)` in meter. Points outside are ignored.
+        max_points: Maximum number of points per voxel.
+        max_voxels: Maximum number of voxels.
+        columns: Point cloud columns used as features when voxelizing a data frame, see ``Lidar.points``. Must start with `'xyz'`.
+        reuse_buffers: If `True`, output arrays are reused between calls.
+
+    Examples:
+        >>> voxelizer = Voxelizer(voxel_size=(0.1, 0.1, 0.2), point_range=(-50, -50, -3, 50, 50, 1), max_points=5, max_voxels=40000)
+        >>> features, coordinates, counts = voxelizer.voxelize(s.lidar[0], lidar_pose=s.lidar.poses[0])
+        >>> pillars = Voxelizer.pillars(pillar_size=(0.16, 0.16), point_range=(-50, -50, -3, 50, 50, 1))
+    """
+
+    @property
+    def grid_size(self) -> Tuple[int, int, int]:
+        """Number of voxels along `x`, `y` and `z`."""
+        return tuple(int(g) for g in self._grid_size)
+
+    def __init__(self, voxel_size: Sequence[float], point_range: Sequence[float], max_points: int = 32,
+                 max_voxels: int = 20000, columns: str = 'xyzi', reuse_buffers: bool = False) -> None:
+        if not columns.startswith('xyz'):
+            raise ValueError(f'Invalid columns `{columns}`. Columns must start with `xyz`.')
+        self._voxel_size: np.ndarray = np.asarray(voxel_size, dtype=np.float64)
+        self._point_range: np.ndarray = np.asarray(point_range, dtype=np.float64)
+        self._grid_size: np.ndarray = np.round((self._point_range[3:] - self._point_range[:3]) / self._voxel_size).astype(np.int64)
+        if len(self._voxel_size) != 3 or len(self._point_range) != 6 or np.any(self._grid_size < 1):
+            raise ValueError(f'Invalid grid of voxel size {tuple(voxel_size)} and point range {tuple(point_range)}.')
+        self._max_points: int = max_points
+        self._max_voxels: int = max_voxels
+        self._columns: str = columns
+        self._reuse_buffers: bool = reuse_buffers
+        self._buffers: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def pillars(cls, pillar_size: Sequence[float], point_range: Sequence[float], max_points: int = 32,
+                max_voxels: int = 16000, columns: str = 'xyzi', reuse_buffers: bool = False) -> 'Voxelizer':
+        """Creates a ``Voxelizer`` for vertical pillars, which span the full height of `point_range`.
+
+        Args:
+            pillar_size: Edge lengths of pillars `(x, y)` in meter.
+            point_range: Grid bounds `(x_min, y_min, z_min, x_max, y_max, z_max)` in meter.
+            max_points: Maximum number of points per pillar.
+            max_voxels: Maximum number of pillars.
+            columns: Point cloud columns used as features when voxelizing a data frame.
+            reuse_buffers: If `True`, output arrays are reused between calls.
+
+        Returns:
+            Instance of ``Voxelizer`` with a single voxel along `z`.
+        """
+        height = point_range[5] - point_range[2]
+        return cls((pillar_size[0], pillar_size[1], height), point_range, max_points, max_voxels, columns, reuse_buffers)
+
+    def voxelize(self, points: Union[np.ndarray, pd.DataFrame], lidar_pose=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Groups the points of a single frame into voxels.
+
+        Args:
+            points: Point cloud data frame as returned by ``Lidar``, or `float` array of shape `(N, C)` with `x`, `y`, `z` in the first columns.
+            lidar_pose: Optional LiDAR pose as dictionary or transformation matrix. If given, points are transformed into ego-coordinates first, see ``geometry.lidar_points_to_ego``.
+
+        Returns:
+            Tuple of
+                - `features`: `float32` array of shape `(V, max_points, C)` with the points of each voxel, zero-padded
+                - `coordinates`: `int32` array of shape `(V, 3)` with the grid index `(x, y, z)` of each voxel
+                - `counts`: `int32` array of shape `(V,)` with the number of points in each voxel
+        """
+        if isinstance(points, pd.DataFrame):
+            points = points[list(self._columns)].to_numpy()
+        # transform before casting, world-coordinates lose precision in `float32`
+        points = np.asarray(points, dtype=np.float32) if lidar_pose is None else np.array(points, dtype=np.float64)
+        if lidar_pose is not None:
+            points[:, :3] = lidar_points_to_ego(points[:, :3], lidar_pose)
+            points = points.astype(np.float32)
+
+        cells = np.floor((points[:, :3] - self._point_range[:3]) / self._voxel_size).astype(np.int64)
+        inside = np.flatnonzero(np.all((cells >= 0) & (cells < self._grid_size), axis=1))
+        cells = cells[inside]
+        keys = (cells[:, 0] * self._grid_size[1] + cells[:, 1]) * self._grid_size[2] + cells[:, 2]
+
+        # stable sort keeps points of a voxel in input order
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(keys) else np.empty(0, dtype=np.int64)
+        counts = np.diff(np.r_[starts, len(keys)])
+
+        # voxels are ranked by their first point, which is the first point of their sorted run
+        voxel_order = np.argsort(order[starts], kind='stable')[:self._max_voxels]
+        voxel_rank = np.full(len(starts), -1, dtype=np.int64)
+        voxel_rank[voxel_order] = np.arange(len(voxel_order))
+        point_voxels = np.repeat(voxel_rank, counts)
+        point_slots = np.arange(len(keys)) - np.repeat(starts, counts)
+        selected = (point_voxels >= 0) & (point_slots < self._max_points)
+
+        features, coordinates, voxel_counts = self._outputs(len(voxel_order), points.shape[1])
+        features[point_voxels[selected], point_slots[selected]] = points[inside[order[selected]]]
+        coordinates[:] = cells[order[starts[voxel_order]]]
+        voxel_counts[:] = np.minimum(counts[voxel_order], self._max_points)
+        return features, coordinates, voxel_counts
+
+    def _outputs(self, voxels: int, features: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if not self._reuse_buffers:
+            return (np.zeros((voxels, self._max_points, features), dtype=np.float32),
+                    np.empty((voxels, 3), dtype=np.int32),
+                    np.empty(voxels, dtype=np.int32))
+        if features not in self._buffers:
+            self._buffers[features] = (np.empty((self._max_voxels, self._max_points, features), dtype=np.float32),
+                                       np.empty((self._max_voxels, 3), dtype=np.int32),
+                                       np.empty(self._max_voxels, dtype=np.int32))
+        buffer_features, buffer_coordinates, buffer_counts = self._buffers[features]
+        buffer_features[:voxels] = 0.0
+        return buffer_features[:voxels], buffer_coordinates[:voxels], buffer_counts[:voxels]
+
+
+if __name__ == '__main__':
+    pass
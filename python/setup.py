@@ -9,6 +9,7 @@ setup(
     author='Nisse Knudsen, Pengchuan Xiao',
     author_email='nisse@scale.com, xiaopengchuan_intern@hesaitech.com',
     packages=['pandaset'],
+    package_data={'pandaset': ['data/*.csv']},
     python_requires='>=3.6',
     long_description='Pandaset Devkit for Python3',
     install_requires=requirements
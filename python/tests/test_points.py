@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_sequence
+from pandaset.aggregation import aggregate_points
+from pandaset.columnar import convert_lidar
+from pandaset.sequence import Sequence
+
+
+@pytest.fixture(params=['pickle', 'columnar'])
+def sequence(request, tmp_path) -> Sequence:
+    directory = make_sequence(str(tmp_path), frames=2, points=1000, cuboids=5, cameras=1, image_size=(64, 48), semseg=False)
+    if request.param == 'columnar':
+        convert_lidar(f'{directory}/lidar')
+    return Sequence(directory)
+
+
+def _original(directory: str, index: int, sensor_id: int) -> pd.DataFrame:
+    df = pd.read_pickle(f'{directory}/lidar/{index:02d}.pkl.gz')
+    return df if sensor_id == -1 else df[df['d'] == sensor_id]
+
+
+@pytest.mark.parametrize('sensor_id', [-1, 0, 1])
+def test_lidar_points_timestamps_round_trip(sequence, sensor_id):
+    sequence.load_lidar(lazy=True)
+    points = sequence.lidar.points(1, sensor_id=sensor_id, columns='xyzit')
+    assert points.dtype == np.float64
+    np.testing.assert_array_equal(points[:, 4], _original(sequence._directory, 1, sensor_id)['t'].to_numpy())
+
+
+def test_aggregate_points_timestamps_round_trip(sequence):
+    points = aggregate_points(sequence, target=0, sensor_id=0, columns='xyzit')
+    assert points.dtype == np.float64
+    expected = np.concatenate([_original(sequence._directory, index, 0)['t'].to_numpy() for index in range(2)])
+    np.testing.assert_array_equal(points[:, 4], expected)
+
+
+def test_ego_points_round_trip(sequence):
+    points = sequence.ego.points(1, sensor_id=1, columns='xyzit')
+    assert points.dtype == np.float64
+    original = _original(sequence._directory, 1, 1)
+    np.testing.assert_array_equal(points[:, 4], original['t'].to_numpy())
+    transform = sequence.lidar.inverse_pose_matrices[1]
+    expected = original[['x', 'y', 'z']].to_numpy() @ transform[:3, :3].T + transform[:3, 3]
+    np.testing.assert_allclose(points[:, :3], expected, rtol=0, atol=1e-4)
+
+
+if __name__ == '__main__':
+    pass